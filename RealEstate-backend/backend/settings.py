@@ -14,6 +14,8 @@ from pathlib import Path
 import sys
 import os
 
+from . import sqlite_tuning
+
 # Ensure Django uses UTF-8 encoding
 DEFAULT_CHARSET = 'utf-8'
 sys.stdout.reconfigure(encoding='utf-8')
@@ -33,10 +35,22 @@ REST_FRAMEWORK = {
         'rest_framework.renderers.JSONRenderer',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'properties.authentication.CachedTokenAuthentication',
     ],
 }
 
+# In-process token -> user cache used by CachedTokenAuthentication
+TOKEN_CACHE = {
+    'TTL': 60,
+    'MAX_SIZE': 10000,
+}
+
+# Opt-in keyset pagination (?cursor= / ?page_size=) for list endpoints
+CURSOR_PAGINATION = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -52,6 +66,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'properties.metrics.MetricsMiddleware',  # First, so timings cover the whole stack
     'corsheaders.middleware.CorsMiddleware',  # CORS Middleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -61,6 +76,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'properties.routers.PrimaryForWritesMiddleware',
 ]
 
 # CORS Settings (for Flutter API access)
@@ -111,13 +127,60 @@ TEMPLATES = [
 WSGI_APPLICATION = 'backend.wsgi.application'
 
 # Database Configuration (SQLite for simplicity)
+# WAL + busy timeout (see backend/sqlite_tuning.py), IMMEDIATE write
+# transactions so concurrent writers queue instead of failing with
+# "database is locked", and connections reused across requests.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': sqlite_tuning.init_command(),
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Read replicas: SQLITE_REPLICAS is a comma-separated list of database files
+# (kept in sync outside Django) that serve reads of REPLICA_MODELS.
+REPLICA_DATABASES = []
+for index, path in enumerate(filter(None, os.environ.get('SQLITE_REPLICAS', '').split(','))):
+    alias = f'replica{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+REPLICA_MODELS = [
+    'properties.property',
+    'properties.category',
+    'properties.comment',
+]
+DATABASE_ROUTERS = ['properties.routers.ReplicaRouter']
+
+# Cache (local memory by default; set REDIS_URL to share it between workers)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'realestate',
+        }
+    }
+
+# Seconds a cached catalogue response (featured, categories, anonymous listings) lives
+RESPONSE_CACHE_TIMEOUT = 300
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -144,3 +207,46 @@ import os
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Weights of the "popular" feed score, refreshed by manage.py refresh_popularity
+POPULARITY_WEIGHTS = {
+    'favorites': 3.0,
+    'comments': 1.0,
+    'purchases': 5.0,
+}
+
+# Resized copies of uploaded property/profile images, stored next to the original
+IMAGE_VARIANTS = {
+    'thumb': (160, 160),
+    'card': (640, 480),
+}
+IMAGE_VARIANT_FORMAT = 'WEBP'
+
+# Notification delivery (properties/notifications.py). RETRY_BACKOFF is the
+# first retry delay in seconds, doubled on every further attempt.
+NOTIFICATIONS = {
+    'TRANSPORT': 'properties.notifications.ConsoleTransport',
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 2.0,
+}
+
+# Per-endpoint request metrics (properties/metrics.py), served at
+# /api/admin/metrics/. Requests slower than SLOW_REQUEST_MS (None disables)
+# are logged with their SLOW_REQUEST_TOP_SQL most expensive statements.
+METRICS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 1000,
+    'SLOW_REQUEST_TOP_SQL': 5,
+}
+
+# Background jobs (properties/jobs.py), run by ``manage.py runworker``.
+# ALWAYS_EAGER runs them in-process after commit instead, with no worker.
+JOBS = {
+    'ALWAYS_EAGER': os.environ.get('JOBS_ALWAYS_EAGER') == '1',
+    'CONCURRENCY': 4,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 5.0,
+    'STALE_AFTER': 600,
+}
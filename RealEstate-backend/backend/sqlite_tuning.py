@@ -0,0 +1,23 @@
+# SQLite tuning applied to every new database connection.
+#
+# Used to build DATABASES['default']['OPTIONS']['init_command'] in
+# settings.py; the benchmark_sqlite management command measures its effect.
+
+PRAGMAS = {
+    # Readers no longer block the writer (and vice versa)
+    'journal_mode': 'WAL',
+    # Safe with WAL: only the last transactions may be lost on power failure
+    'synchronous': 'NORMAL',
+    # Wait for a lock instead of failing with "database is locked" (ms)
+    'busy_timeout': 20000,
+    # Page cache per connection, negative values are KiB (64 MB)
+    'cache_size': -65536,
+    # Memory-map the first 256 MB of the database file
+    'mmap_size': 268435456,
+    'temp_store': 'MEMORY',
+}
+
+
+def init_command(pragmas=None):
+    pragmas = PRAGMAS if pragmas is None else pragmas
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
@@ -0,0 +1,151 @@
+import copy
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException, AuthenticationFailed, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import token_cache
+from .filters import PropertyFilterBackend, PropertyOrderingFilter
+from .models import Category, Comment, Property
+from .pagination import CommentCursorPagination, PropertyCursorPagination
+from .serializers import CategorySerializer, CommentSerializer, PropertySerializer
+from .views import featured_property_data
+from . import cache as response_cache
+
+
+# Async-native versions of the hot catalogue read endpoints, mounted under
+# /api/async/. Under ASGI (backend/asgi.py) a request waiting on the
+# database does not hold a worker thread; under WSGI they still work, one
+# request per thread. Responses match their sync counterparts and share the
+# same response cache namespaces.
+
+async def authenticate(request):
+    # Async equivalent of CachedTokenAuthentication
+    header = request.headers.get('Authorization', '').split()
+    if not header or header[0].lower() != 'token':
+        return AnonymousUser()
+    if len(header) != 2:
+        raise AuthenticationFailed('Invalid token header.')
+
+    key = header[1]
+    token = token_cache.get(key)
+    if token is None:
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed('Invalid token.')
+        if not token.user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        token_cache.set(key, token)
+
+    return copy.copy(token.user)
+
+
+def render(data, status=200):
+    # Same bytes as a DRF Response rendered with JSONRenderer
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncReadView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = await authenticate(request)
+
+            # The DRF filter backends and paginators expect a DRF request
+            self.drf_request = Request(request)
+            self.drf_request.user = request.user
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            # Same bodies and status codes as DRF's exception handler
+            data = exc.detail if isinstance(exc, ValidationError) else {'detail': exc.detail}
+            return render(data, status=exc.status_code)
+
+    def visible_properties(self):
+        queryset = Property.objects.all()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(status='approved')
+
+    async def serialize_properties(self, properties):
+        favorite_ids = await sync_to_async(Property.favorite_ids_for)(
+            self.request.user,
+            [prop.pk for prop in properties]
+        )
+        return PropertySerializer(
+            properties,
+            many=True,
+            context={'request': self.drf_request, 'favorite_ids': favorite_ids}
+        ).data
+
+
+class AsyncFeaturedPropertiesView(AsyncReadView):
+    @response_cache.cached_response(response_cache.FEATURED)
+    async def get(self, request, *args, **kwargs):
+        featured_properties = Property.objects.for_listing().filter(
+            is_featured=True,
+            status='approved'
+        )
+        data = [featured_property_data(prop) async for prop in featured_properties]
+        return JsonResponse(data, safe=False)
+
+
+class AsyncPropertyListView(AsyncReadView):
+    pagination_class = PropertyCursorPagination
+    filter_backends = [PropertyFilterBackend, PropertyOrderingFilter]
+
+    @response_cache.cached_response(response_cache.PROPERTIES, anonymous_only=True)
+    async def get(self, request, *args, **kwargs):
+        queryset = self.visible_properties().for_listing()
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.drf_request, queryset, self)
+
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.drf_request, view=self)
+        if page is not None:
+            data = await self.serialize_properties(page)
+            return render(paginator.get_paginated_data(data))
+
+        return render(await self.serialize_properties([prop async for prop in queryset]))
+
+
+class AsyncPropertyDetailView(AsyncReadView):
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            prop = await self.visible_properties().for_listing().aget(pk=pk)
+        except Property.DoesNotExist:
+            return render({'detail': 'No Property matches the given query.'}, status=404)
+
+        data = await self.serialize_properties([prop])
+        return render(data[0])
+
+
+class AsyncCategoryListView(AsyncReadView):
+    @response_cache.cached_response(response_cache.CATEGORIES)
+    async def get(self, request, *args, **kwargs):
+        categories = [category async for category in Category.objects.all()]
+        return render(CategorySerializer(categories, many=True).data)
+
+
+class AsyncPropertyCommentsView(AsyncReadView):
+    @response_cache.cached_response(
+        lambda pk=None, **kwargs: response_cache.comments_namespace(pk),
+        first_page_only=True
+    )
+    async def get(self, request, pk, *args, **kwargs):
+        if not await self.visible_properties().filter(pk=pk).aexists():
+            return render({'detail': 'No Property matches the given query.'}, status=404)
+
+        comments = Comment.objects.filter(property_id=pk).for_listing()
+        paginator = CommentCursorPagination()
+        page = await paginator.apaginate_queryset(comments, self.drf_request, view=self)
+        if page is not None:
+            return render(paginator.get_paginated_data(CommentSerializer(page, many=True).data))
+
+        return render(CommentSerializer([comment async for comment in comments], many=True).data)
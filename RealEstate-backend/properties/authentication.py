@@ -0,0 +1,72 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+
+
+# In-process LRU cache of token key -> Token (with its user joined).
+#
+# Entries expire after TOKEN_CACHE['TTL'] seconds and are dropped right away
+# by the signals in signals.py when a token is deleted or its user is saved
+# (deactivation, password change, ...). Other worker processes only see
+# such changes once their own entry expires, so keep the TTL short.
+class TokenCache:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _config(self):
+        config = getattr(settings, 'TOKEN_CACHE', {})
+        return config.get('TTL', 60), config.get('MAX_SIZE', 10000)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token
+
+    def set(self, key, token):
+        ttl, max_size = self._config()
+        with self._lock:
+            self._entries[key] = (token, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_key(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [key for key, (token, _) in self._entries.items() if token.user_id == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            _, token = super().authenticate_credentials(key)
+            token_cache.set(key, token)
+
+        # Hand every request its own copy so per-request changes to
+        # ``request.user`` never leak into the shared cache entry.
+        return copy.copy(token.user), token
@@ -0,0 +1,347 @@
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from . import cache as response_cache
+from . import counters
+from . import search
+from .models import Category, Comment, Profile, Property, Purchase
+
+
+# Seeding of a realistic-size catalogue and the scripted API scenarios run
+# by ``manage.py benchmark_api``.
+#
+# Scenarios go through Django's test client in-process, where each worker
+# thread counts the queries of its own requests, or through HTTP against a
+# running server (``base_url``), where query counts are not available.
+# Results are plain dicts so they can be stored as JSON and compared
+# between commits.
+
+USER_PREFIX = 'bench-user-'
+PASSWORD = 'benchmark-pass'
+TYPES = ['Apartment', 'Villa', 'House', 'Office', 'Studio', 'Land']
+LOCATIONS = ['Amman', 'Irbid', 'Zarqa', 'Aqaba', 'Madaba', 'Jerash', 'Salt', 'Karak']
+ADJECTIVES = ['Sunny', 'Modern', 'Quiet', 'Spacious', 'Cozy', 'Luxury', 'Classic', 'Renovated']
+CATEGORY_NAMES = ['Apartments', 'Villas', 'Houses', 'Offices', 'Studios', 'Land', 'Chalets', 'Farms']
+# Words that appear in seeded property names, used as search terms
+SEARCH_TERMS = ADJECTIVES + TYPES + LOCATIONS
+
+SCENARIOS = ['list', 'search', 'featured', 'checkout', 'comments']
+PERCENTILES = (50, 95, 99)
+
+
+def seed(categories=10, properties=5000, users=500, favorites=20000, purchases=5000,
+         comments=20000, batch_size=1000, rng=None):
+    # Adds the given number of rows on top of what already exists; returns
+    # the number created per model. Counters, popularity and the search
+    # index are rebuilt once at the end instead of per row.
+    rng = rng or random.Random()
+    created = {}
+
+    with transaction.atomic():
+        category_objs = Category.objects.bulk_create([
+            Category(name=f'{CATEGORY_NAMES[index % len(CATEGORY_NAMES)]} {index + 1}')
+            for index in range(categories)
+        ], batch_size=batch_size)
+        category_ids = [category.pk for category in category_objs] or list(
+            Category.objects.values_list('pk', flat=True)
+        )
+        created['categories'] = len(category_objs)
+
+        # One hash for every seeded user: hashing is deliberately slow
+        password = make_password(PASSWORD)
+        offset = User.objects.filter(username__startswith=USER_PREFIX).count()
+        user_objs = User.objects.bulk_create([
+            User(
+                username=f'{USER_PREFIX}{offset + index}@example.com',
+                email=f'{USER_PREFIX}{offset + index}@example.com',
+                first_name=f'User {offset + index}',
+                password=password,
+            )
+            for index in range(users)
+        ], batch_size=batch_size)
+        # bulk_create sends no post_save, so create the profiles here
+        Profile.objects.bulk_create([Profile(user=user) for user in user_objs], batch_size=batch_size)
+        user_ids = [user.pk for user in user_objs] or list(User.objects.values_list('pk', flat=True))
+        created['users'] = len(user_objs)
+
+        if not category_ids and properties:
+            raise ValueError('Properties need at least one category.')
+        property_objs = Property.objects.bulk_create([
+            Property(
+                name=f'{rng.choice(ADJECTIVES)} {property_type} in {location}',
+                type=property_type,
+                location=location,
+                price=rng.randrange(20000, 900000, 500),
+                transaction_type=rng.choice(['sale', 'rent']),
+                is_featured=rng.random() < 0.02,
+                status='approved' if rng.random() < 0.95 else 'pending',
+                category_id=rng.choice(category_ids),
+            )
+            for property_type, location in (
+                (rng.choice(TYPES), rng.choice(LOCATIONS)) for _ in range(properties)
+            )
+        ], batch_size=batch_size)
+        property_ids = [prop.pk for prop in property_objs] or list(
+            Property.objects.values_list('pk', flat=True)
+        )
+        created['properties'] = len(property_objs)
+
+        if (favorites or purchases or comments) and not (user_ids and property_ids):
+            raise ValueError('Favorites, purchases and comments need users and properties.')
+
+        through = Property.favorites.through
+        pairs = {(rng.choice(user_ids), rng.choice(property_ids)) for _ in range(favorites)}
+        through.objects.bulk_create(
+            [through(user_id=user_id, property_id=property_id) for user_id, property_id in pairs],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+        created['favorites'] = len(pairs)
+
+        Purchase.objects.bulk_create([
+            Purchase(
+                user_id=rng.choice(user_ids),
+                property_id=rng.choice(property_ids),
+                quantity=rng.randint(1, 3)
+            )
+            for _ in range(purchases)
+        ], batch_size=batch_size)
+        created['purchases'] = purchases
+
+        Comment.objects.bulk_create([
+            Comment(
+                user_id=rng.choice(user_ids),
+                property_id=rng.choice(property_ids),
+                content=f'{rng.choice(ADJECTIVES)} place, comment {index}'
+            )
+            for index in range(comments)
+        ], batch_size=batch_size)
+        created['comments'] = comments
+
+        counters.reconcile()
+        counters.refresh_popularity()
+
+    search.rebuild_index(batch_size=batch_size)
+    response_cache.invalidate(
+        response_cache.PROPERTIES, response_cache.FEATURED, response_cache.CATEGORIES
+    )
+    return created
+
+
+class Dataset:
+    # Ids the scenarios pick from, loaded once before a run
+    def __init__(self, users=50):
+        self.category_ids = list(Category.objects.values_list('pk', flat=True))
+        self.property_ids = list(
+            Property.objects.filter(status='approved').values_list('pk', flat=True)
+        )
+        if not self.property_ids:
+            raise ValueError('No approved properties; run manage.py seed_data first.')
+
+        # Checkout needs authenticated users; seeded ones if there are any
+        accounts = list(User.objects.filter(username__startswith=USER_PREFIX).order_by('pk')[:users])
+        if not accounts:
+            accounts = [User.objects.get_or_create(username=f'{USER_PREFIX}0@example.com')[0]]
+        self.tokens = [Token.objects.get_or_create(user=user)[0].key for user in accounts]
+
+    def counts(self):
+        return {
+            'categories': Category.objects.count(),
+            'properties': Property.objects.count(),
+            'users': User.objects.count(),
+            'favorites': Property.favorites.through.objects.count(),
+            'purchases': Purchase.objects.count(),
+            'comments': Comment.objects.count(),
+        }
+
+
+# Scenarios: ``(dataset, rng) -> (method, path, json body or None, token or None)``
+def list_scenario(dataset, rng):
+    path = '/api/properties/?page_size=20'
+    if dataset.category_ids and rng.random() < 0.5:
+        path += f'&category_id={rng.choice(dataset.category_ids)}'
+    return 'GET', path, None, None
+
+
+def search_scenario(dataset, rng):
+    return 'GET', f'/api/properties/search/?q={rng.choice(SEARCH_TERMS)}&page_size=20', None, None
+
+
+def featured_scenario(dataset, rng):
+    return 'GET', '/api/properties/featured/', None, None
+
+
+def checkout_scenario(dataset, rng):
+    items = [
+        {'property_id': property_id, 'quantity': rng.randint(1, 2)}
+        for property_id in rng.sample(dataset.property_ids, min(3, len(dataset.property_ids)))
+    ]
+    return 'POST', '/api/cart/checkout/', {'items': items}, rng.choice(dataset.tokens)
+
+
+def comments_scenario(dataset, rng):
+    return 'GET', f'/api/properties/{rng.choice(dataset.property_ids)}/comments/', None, None
+
+
+SCENARIO_FUNCTIONS = {
+    'list': list_scenario,
+    'search': search_scenario,
+    'featured': featured_scenario,
+    'checkout': checkout_scenario,
+    'comments': comments_scenario,
+}
+
+
+class ClientTransport:
+    # In-process requests through the full middleware stack
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body, token):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        headers = {'Authorization': f'Token {token}'} if token else {}
+        with connection.execute_wrapper(count):
+            if method == 'GET':
+                response = client.get(path, headers=headers)
+            else:
+                response = client.post(
+                    path, json.dumps(body), content_type='application/json', headers=headers
+                )
+        return response.status_code, queries[0]
+
+    def close(self):
+        # Worker threads own their database connections
+        connection.close()
+
+
+class HTTPTransport:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, body, token):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, None
+        except urllib.error.HTTPError as exc:
+            return exc.code, None
+
+    def close(self):
+        pass
+
+
+def run_scenario(name, dataset, transport, requests=200, concurrency=1, warmup=10, seed=None):
+    scenario = SCENARIO_FUNCTIONS[name]
+    rng = random.Random(seed)
+    calls = [scenario(dataset, rng) for _ in range(warmup + requests)]
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+
+    def call(spec):
+        start = time.perf_counter()
+        try:
+            status_code, query_count = transport.request(*spec)
+        except Exception as exc:
+            status_code, query_count = repr(exc), None
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if query_count is not None:
+                queries.append(query_count)
+            if not isinstance(status_code, int) or status_code >= 400:
+                errors.append(status_code)
+
+    for spec in calls[:warmup]:
+        transport.request(*spec)
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        # Inline, so a surrounding transaction (tests) sees the same data
+        for spec in calls[warmup:]:
+            call(spec)
+    else:
+        def worker(specs):
+            try:
+                for spec in specs:
+                    call(spec)
+            finally:
+                transport.close()
+
+        chunks = [calls[warmup + index::concurrency] for index in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, chunks))
+    elapsed = time.perf_counter() - start
+
+    return summarize(latencies, queries, errors, elapsed)
+
+
+def summarize(latencies, queries, errors, elapsed):
+    ordered = sorted(latencies)
+    result = {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_samples': sorted({str(error) for error in errors})[:5],
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+    }
+    for percentile in PERCENTILES:
+        result[f'p{percentile}_ms'] = round(percentile_of(ordered, percentile) * 1000, 3)
+    result['queries_per_request'] = round(statistics.fmean(queries), 2) if queries else None
+    result['max_queries'] = max(queries) if queries else None
+    return result
+
+
+def percentile_of(ordered, percentile):
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-percentile * len(ordered) // 100))
+    return ordered[rank - 1]
+
+
+def compare(baseline, current, threshold=10.0):
+    # Per scenario and metric: (baseline, current, % change or None when the
+    # baseline is 0, regressed).
+    # Latency regresses when it grows more than ``threshold`` percent;
+    # queries per request regress on any increase.
+    report = {}
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        rows = {}
+        for metric in [f'p{percentile}_ms' for percentile in PERCENTILES] + ['queries_per_request']:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = round((new - old) / old * 100, 1) if old else None
+            limit = 0.0 if metric == 'queries_per_request' else threshold
+            rows[metric] = (old, new, change, new > old and (change is None or change > limit))
+        report[name] = rows
+    return report
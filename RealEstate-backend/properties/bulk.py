@@ -0,0 +1,201 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+from . import cache as response_cache
+from . import search
+from .models import Category, Property
+
+FORMATS = ('csv', 'ndjson')
+EXPORT_FIELDS = [
+    'id', 'name', 'type', 'location', 'price', 'transaction_type',
+    'is_featured', 'status', 'category', 'image_url',
+]
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# Bulk import / export of property listings as CSV or NDJSON.
+#
+# Imports are read as a stream and processed in batches: one query resolves
+# the categories referenced by a batch, rows are validated with
+# PropertyImportSerializer and the valid ones are written with a single
+# bulk_create per batch inside a transaction.
+
+class PropertyImportSerializer(serializers.ModelSerializer):
+    # Category id or name, resolved from the batch lookup in the context
+    category = serializers.CharField()
+    # Remote URL or an already stored file name, as written by the export
+    image_url = serializers.CharField(required=False, allow_blank=True)
+
+    class Meta:
+        model = Property
+        fields = [
+            'name', 'type', 'location', 'price', 'transaction_type',
+            'is_featured', 'status', 'category', 'image_url',
+        ]
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(_category_key(value))
+        if category is None:
+            raise serializers.ValidationError(f"Unknown category '{value}'.")
+        return category
+
+
+def infer_format(filename, default='csv'):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    return 'csv' if extension == 'csv' else default
+
+
+def read_rows(fileobj, fmt):
+    # Yields (line number, row dict) without loading the whole file
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Empty cells mean "use the default", like a missing NDJSON key
+            yield reader.line_num, {
+                key: value for key, value in row.items()
+                if key is not None and value not in ('', None)
+            }
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def import_properties(rows, user=None, batch_size=500):
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    for line_number, row in rows:
+        batch.append((line_number, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, user, report)
+            batch = []
+    if batch:
+        _import_batch(batch, user, report)
+
+    if report['created']:
+        response_cache.invalidate(response_cache.PROPERTIES, response_cache.FEATURED)
+    return report
+
+
+def _import_batch(batch, user, report):
+    categories = _resolve_categories(row for _, row in batch)
+
+    properties = []
+    for line_number, row in batch:
+        if row is None:
+            report['failed'] += 1
+            report['errors'].append({'row': line_number, 'errors': {'row': ['Invalid JSON object.']}})
+            continue
+
+        serializer = PropertyImportSerializer(data=row, context={'categories': categories})
+        if not serializer.is_valid():
+            report['failed'] += 1
+            report['errors'].append({'row': line_number, 'errors': serializer.errors})
+            continue
+
+        data = dict(serializer.validated_data)
+        image_url = data.pop('image_url', '')
+        if user is not None and user.is_staff:
+            data.setdefault('status', 'approved')
+        elif user is not None:
+            # Agents' listings go through moderation, as in PropertySerializer.create
+            data['status'] = 'pending'
+            data['is_featured'] = False
+        properties.append(Property(added_by=user, image_path=image_url or None, **data))
+
+    if not properties:
+        return
+
+    with transaction.atomic():
+        created = Property.objects.bulk_create(properties)
+        # bulk_create sends no post_save, so index the new rows here
+        search.schedule_sync(prop.pk for prop in created)
+    report['created'] += len(created)
+
+
+def _resolve_categories(rows):
+    ids, names = set(), set()
+    for row in rows:
+        value = str(row.get('category') or '').strip() if isinstance(row, dict) else ''
+        if value.isdigit():
+            ids.add(int(value))
+        elif value:
+            names.add(value.lower())
+
+    if not ids and not names:
+        return {}
+
+    categories = {}
+    queryset = Category.objects.annotate(name_key=Lower('name'))
+    for category in queryset.filter(Q(id__in=ids) | Q(name_key__in=names)):
+        categories[str(category.id)] = category
+        categories.setdefault(_category_key(category.name), category)
+    return categories
+
+
+def _category_key(value):
+    value = str(value).strip()
+    return value if value.isdigit() else value.lower()
+
+
+def export_rows(queryset, chunk_size=1000):
+    queryset = queryset.select_related('category').order_by('id')
+    for prop in queryset.iterator(chunk_size=chunk_size):
+        yield {
+            'id': prop.id,
+            'name': prop.name,
+            'type': prop.type,
+            'location': prop.location,
+            'price': str(prop.price),
+            'transaction_type': prop.transaction_type,
+            'is_featured': prop.is_featured,
+            'status': prop.status,
+            'category': prop.category.name,
+            'image_url': prop.image_path.name if prop.image_path else '',
+        }
+
+
+def export_lines(queryset, fmt):
+    rows = export_rows(queryset)
+    if fmt == 'ndjson':
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+        return
+
+    buffer = _LineBuffer()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_response(queryset, fmt):
+    response = StreamingHttpResponse(export_lines(queryset, fmt), content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="properties.{fmt}"'
+    return response
+
+
+class _LineBuffer:
+    # csv.writer target that hands each written line straight back
+    def write(self, value):
+        return value
@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import inspect
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+
+# Cache of rendered JSON responses for the public catalogue endpoints.
+#
+# Keys embed a per-namespace version number; the signals in signals.py bump
+# the version of the affected namespaces after each committed write, which
+# invalidates every cached response of that namespace at once.
+
+PROPERTIES = 'properties'
+FEATURED = 'featured'
+CATEGORIES = 'categories'
+
+
+def comments_namespace(property_id):
+    # One namespace per property, so a new comment only drops its own page
+    return f'comments:{property_id}'
+
+STATS_KEYS = {'hits': 'response-cache:stats:hits', 'misses': 'response-cache:stats:misses'}
+
+
+def _version_key(namespace):
+    return f'response-cache:version:{namespace}'
+
+
+def namespace_version(namespace):
+    return cache.get_or_set(_version_key(namespace), 1, timeout=None)
+
+
+def invalidate(*namespaces):
+    for namespace in namespaces:
+        try:
+            cache.incr(_version_key(namespace))
+        except ValueError:
+            cache.set(_version_key(namespace), 1, timeout=None)
+
+
+def invalidate_on_commit(*namespaces):
+    transaction.on_commit(lambda: invalidate(*namespaces))
+
+
+def auth_class(request):
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return 'anon'
+    return 'staff' if user.is_staff else 'user'
+
+
+def response_key(namespace, request):
+    params = urlencode(sorted(request.GET.lists()), doseq=True)
+    raw = f'{request.path}?{params}'
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    version = namespace_version(namespace)
+    return f'response-cache:{namespace}:{version}:{auth_class(request)}:{digest}'
+
+
+def _count(name):
+    try:
+        cache.incr(STATS_KEYS[name])
+    except ValueError:
+        cache.set(STATS_KEYS[name], 1, timeout=None)
+
+
+def stats():
+    counts = cache.get_many(STATS_KEYS.values())
+    result = {name: counts.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = result['hits'] + result['misses']
+    result['hit_ratio'] = round(result['hits'] / total, 4) if total else 0.0
+    return result
+
+
+def cached_response(namespace, anonymous_only=False, first_page_only=False):
+    # Decorates a view handler ``(self, request, ...)``. Works for DRF
+    # handlers (the body is stored once it has been rendered), plain Django
+    # views returning an HttpResponse and async handlers.
+    #
+    # ``namespace`` may be a callable taking the view kwargs (e.g. ``pk``);
+    # ``first_page_only`` skips requests that carry a pagination cursor.
+    def cache_key(request, kwargs):
+        if request.method != 'GET' or (anonymous_only and auth_class(request) != 'anon'):
+            return None
+        if first_page_only and 'cursor' in request.GET:
+            return None
+        return response_key(namespace(**kwargs) if callable(namespace) else namespace, request)
+
+    def decorator(handler):
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(self, request, *args, **kwargs):
+                key, entry = await sync_to_async(_lookup)(cache_key, request, kwargs)
+                if entry is not None:
+                    return _hit_response(entry)
+                response = await handler(self, request, *args, **kwargs)
+                if key is not None and not response.streaming:
+                    await sync_to_async(_store)(key, response)
+                    response['X-Cache'] = 'MISS'
+                return response
+
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            key, entry = _lookup(cache_key, request, kwargs)
+            if entry is not None:
+                return _hit_response(entry)
+            response = handler(self, request, *args, **kwargs)
+            if key is None or response.streaming:
+                return response
+
+            if hasattr(response, 'add_post_render_callback'):
+                response.add_post_render_callback(lambda rendered: _store(key, rendered))
+            else:
+                _store(key, response)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+    return decorator
+
+
+def _lookup(cache_key, request, kwargs):
+    key = cache_key(request, kwargs)
+    if key is None:
+        return None, None
+    entry = cache.get(key)
+    _count('hits' if entry is not None else 'misses')
+    return key, entry
+
+
+def _hit_response(entry):
+    content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def _store(key, rendered):
+    if rendered.status_code == 200:
+        timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+        cache.set(key, (rendered.content, rendered['Content-Type']), timeout)
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from . import cache as response_cache
+from .models import Comment, Property, Purchase
+
+
+# Denormalized popularity counters on Property. Comments and purchases are
+# adjusted with F() increments; favorites are recounted from the M2M table,
+# which stays exact when the same user is added or removed twice.
+#
+# The counters and the popularity score are part of cached listing
+# responses, so every change invalidates them once it has committed.
+
+def adjust(field, amounts):
+    # ``amounts`` maps property id -> delta; applied in a single UPDATE
+    amounts = {pk: delta for pk, delta in amounts.items() if pk and delta}
+    if not amounts:
+        return
+
+    if len(set(amounts.values())) == 1:
+        delta = Value(next(iter(amounts.values())))
+    else:
+        delta = Case(
+            *[When(pk=pk, then=Value(value)) for pk, value in amounts.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    Property.objects.filter(pk__in=amounts.keys()).update(
+        **{field: Greatest(F(field) + delta, Value(0))}
+    )
+    _invalidate_responses()
+
+
+def recount_favorites(property_ids):
+    if property_ids:
+        Property.objects.filter(pk__in=list(property_ids)).update(
+            favorites_count=_favorites_subquery()
+        )
+        _invalidate_responses()
+
+
+def reconcile(queryset=None):
+    # Recompute every counter from the source tables; returns rows repaired
+    queryset = Property.objects.all() if queryset is None else queryset
+    drifted = queryset.annotate(
+        actual_favorites=_favorites_subquery(),
+        actual_comments=_comments_subquery(),
+        actual_purchases=_purchases_subquery(),
+    ).filter(
+        ~Q(favorites_count=F('actual_favorites')) |
+        ~Q(comments_count=F('actual_comments')) |
+        ~Q(purchases_count=F('actual_purchases'))
+    ).values_list('pk', flat=True)
+
+    repaired = Property.objects.filter(pk__in=list(drifted)).update(
+        favorites_count=_favorites_subquery(),
+        comments_count=_comments_subquery(),
+        purchases_count=_purchases_subquery(),
+    )
+    if repaired:
+        _invalidate_responses()
+    return repaired
+
+
+def refresh_popularity():
+    # Recompute the stored "popular" ranking from the counters in one UPDATE;
+    # run periodically (manage.py refresh_popularity) rather than per request.
+    weights = getattr(settings, 'POPULARITY_WEIGHTS', {})
+    score = ExpressionWrapper(
+        F('favorites_count') * weights.get('favorites', 1.0) +
+        F('comments_count') * weights.get('comments', 1.0) +
+        F('purchases_count') * weights.get('purchases', 1.0),
+        output_field=FloatField()
+    )
+    updated = Property.objects.exclude(popularity_score=score).update(popularity_score=score)
+    if updated:
+        _invalidate_responses()
+    return updated
+
+
+def _invalidate_responses():
+    response_cache.invalidate_on_commit(response_cache.PROPERTIES, response_cache.FEATURED)
+
+
+def _favorites_subquery():
+    through = Property.favorites.through
+    return Coalesce(Subquery(
+        through.objects.filter(property_id=OuterRef('pk'))
+        .order_by().values('property_id').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _comments_subquery():
+    return Coalesce(Subquery(
+        Comment.objects.filter(property_id=OuterRef('pk'))
+        .order_by().values('property_id').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _purchases_subquery():
+    return Coalesce(Subquery(
+        Purchase.objects.filter(property_id=OuterRef('pk'))
+        .order_by().values('property_id').annotate(total=Sum('quantity')).values('total')
+    ), 0)
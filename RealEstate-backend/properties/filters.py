@@ -0,0 +1,143 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Max, Min
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+
+# Query-string filters for PropertyViewSet list endpoints. The status,
+# category, featured and transaction_type/price filters line up with the
+# composite Property.Meta.indexes.
+class PropertyFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        min_price = _decimal_param(params, 'min_price')
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+
+        max_price = _decimal_param(params, 'max_price')
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+
+        category_id = _int_param(params, 'category_id')
+        if category_id is not None:
+            queryset = queryset.filter(category_id=category_id)
+
+        is_featured = _bool_param(params, 'is_featured')
+        if is_featured is not None:
+            queryset = queryset.filter(is_featured=is_featured)
+
+        if params.get('type'):
+            queryset = queryset.filter(type__iexact=params['type'])
+        if params.get('transaction_type'):
+            queryset = queryset.filter(transaction_type=params['transaction_type'])
+        if params.get('location'):
+            queryset = queryset.filter(location__icontains=params['location'])
+
+        # Status is only selectable by staff; everyone else sees approved only
+        if params.get('status') and request.user.is_staff:
+            queryset = queryset.filter(status=params['status'])
+
+        return queryset
+
+
+# ``?ordering=`` for unpaginated lists; uses the same names and keys as the
+# view's keyset paginator so both modes return rows in the same order.
+class PropertyOrderingFilter(BaseFilterBackend):
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param)
+        orderings = view.pagination_class.orderings
+        if ordering in orderings:
+            queryset = queryset.order_by(*orderings[ordering])
+        return queryset
+
+
+def facet_counts(queryset):
+    # A single GROUP BY over the filtered queryset, folded into facets
+    rows = queryset.order_by().values(
+        'category_id',
+        'category__name',
+        'type',
+        'transaction_type',
+        'is_featured',
+    ).annotate(
+        count=Count('id'),
+        min_price=Min('price'),
+        max_price=Max('price'),
+    )
+
+    facets = {
+        'total': 0,
+        'category': [],
+        'type': {},
+        'transaction_type': {},
+        'is_featured': {'true': 0, 'false': 0},
+        'price': {'min': None, 'max': None},
+    }
+    categories = {}
+
+    for row in rows:
+        count = row['count']
+        facets['total'] += count
+
+        category = categories.setdefault(row['category_id'], {
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'count': 0,
+        })
+        category['count'] += count
+
+        facets['type'][row['type']] = facets['type'].get(row['type'], 0) + count
+        facets['transaction_type'][row['transaction_type']] = (
+            facets['transaction_type'].get(row['transaction_type'], 0) + count
+        )
+        facets['is_featured']['true' if row['is_featured'] else 'false'] += count
+
+        price = facets['price']
+        if price['min'] is None or row['min_price'] < price['min']:
+            price['min'] = row['min_price']
+        if price['max'] is None or row['max_price'] > price['max']:
+            price['max'] = row['max_price']
+
+    facets['category'] = sorted(categories.values(), key=lambda item: (-item['count'], item['id']))
+    for key in ('min', 'max'):
+        if facets['price'][key] is not None:
+            facets['price'][key] = f"{facets['price'][key]:.2f}"
+    return facets
+
+
+def _decimal_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise serializers.ValidationError({name: 'A valid number is required.'})
+    return number
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise serializers.ValidationError({name: 'A valid integer is required.'})
+
+
+def _bool_param(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise serializers.ValidationError({name: 'Must be true or false.'})
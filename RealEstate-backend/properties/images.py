@@ -0,0 +1,122 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from . import cache as response_cache
+from . import jobs
+
+
+# Resized derivatives ("variants") of uploaded images.
+#
+# For ``property_images/house.jpg`` the ``thumb`` variant is stored next to
+# it as ``property_images/house_thumb.webp``. Variants are generated by a
+# background job once the upload has been committed, so the request that
+# uploaded the image does not wait for Pillow. The job then records the image
+# name in the model's ``variants_source``; serializers trust that field
+# instead of asking the storage whether each variant exists.
+
+
+def variant_sizes():
+    return getattr(settings, 'IMAGE_VARIANTS', {})
+
+
+def variant_format():
+    image_format = getattr(settings, 'IMAGE_VARIANT_FORMAT', 'WEBP').upper()
+    if image_format == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return image_format
+
+
+def variant_name(name, variant):
+    extension = 'webp' if variant_format() == 'WEBP' else 'jpg'
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{variant}.{extension}'
+
+
+def is_local(field_file):
+    # Some listings store a remote URL instead of an uploaded file
+    return bool(field_file) and not field_file.name.startswith('http')
+
+
+def generate_variants(storage, name, force=False):
+    image_format = variant_format()
+    created = []
+
+    targets = {variant: variant_name(name, variant) for variant in variant_sizes()}
+    if not force:
+        targets = {variant: target for variant, target in targets.items() if not storage.exists(target)}
+        if not targets:
+            return created
+
+    with storage.open(name, 'rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA') or image_format == 'JPEG':
+        image = image.convert('RGB')
+
+    for variant, target in targets.items():
+        size = variant_sizes()[variant]
+        if storage.exists(target):
+            storage.delete(target)
+
+        resized = image.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, format=image_format, quality=80)
+        storage.save(target, ContentFile(buffer.getvalue()))
+        created.append(target)
+
+    return created
+
+
+def variants_ready(field_file, source):
+    # ``source`` is the model's variants_source
+    return bool(field_file) and field_file.name == source
+
+
+def schedule_variants(field_file, source):
+    if not is_local(field_file) or variants_ready(field_file, source):
+        return
+
+    # Images are saved to the default storage, which the worker reopens
+    jobs.enqueue(
+        'images.variants',
+        {'name': field_file.name},
+        idempotency_key=f'image-variants:{field_file.name}'
+    )
+
+
+@jobs.job('images.variants')
+def generate_variants_job(name):
+    generate_variants(default_storage, name)
+    mark_ready(name)
+
+
+def mark_ready(name):
+    from .models import Profile, Property
+
+    # Rows whose image has been replaced meanwhile keep their old source
+    if Property.objects.filter(image_path=name).update(variants_source=name):
+        response_cache.invalidate(response_cache.PROPERTIES, response_cache.FEATURED)
+    Profile.objects.filter(image=name).update(variants_source=name)
+
+
+def variant_urls(field_file, source, request=None):
+    # Computed from the name alone; no storage access per row
+    if not field_file:
+        return {}
+    if not is_local(field_file):
+        return {variant: field_file.name for variant in variant_sizes()}
+
+    ready = variants_ready(field_file, source)
+    urls = {}
+    for variant in variant_sizes():
+        # Fall back to the original until the variants have been generated
+        url = field_file.storage.url(variant_name(field_file.name, variant)) if ready else field_file.url
+        urls[variant] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,192 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .routers import use_primary
+
+logger = logging.getLogger(__name__)
+
+
+# Background jobs for slow side effects of a write (thumbnails, search
+# indexing, notification delivery).
+#
+# ``enqueue`` inserts a Job row in the caller's transaction, so the job only
+# becomes visible to workers if the write commits. ``manage.py runworker``
+# claims due jobs and runs them in a thread pool; failures are retried with
+# exponential backoff. Jobs that succeed are deleted, failed ones are kept
+# for inspection. With JOBS['ALWAYS_EAGER'] jobs run in-process right after
+# the commit instead (tests, single-process development).
+#
+# Handlers read from the primary database, like the write requests that
+# enqueue them: a replica may not have the committed write yet.
+
+_registry = {}
+
+
+def config():
+    return {
+        'ALWAYS_EAGER': False,
+        'CONCURRENCY': 4,
+        'POLL_INTERVAL': 1.0,
+        'MAX_ATTEMPTS': 3,
+        'RETRY_BACKOFF': 5.0,
+        'STALE_AFTER': 600,
+        **getattr(settings, 'JOBS', {}),
+    }
+
+
+def job(name):
+    # Registers ``func(**payload)`` as the handler of jobs called ``name``
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, idempotency_key=None, run_at=None, max_attempts=None):
+    # A queued job with the same idempotency key already covers this one:
+    # handlers read the current state when they run.
+    if name not in _registry:
+        raise ValueError(f"Unknown job '{name}'")
+    payload = payload or {}
+
+    if config()['ALWAYS_EAGER']:
+        transaction.on_commit(lambda: _run_eagerly(name, payload))
+        return
+
+    Job.objects.bulk_create([
+        Job(
+            name=name,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            run_at=run_at or timezone.now(),
+            max_attempts=max_attempts or config()['MAX_ATTEMPTS'],
+        )
+    ], ignore_conflicts=True)
+
+
+def run_pending():
+    # Runs every due job in the current thread; returns how many ran
+    return Worker(concurrency=1).run(burst=True)
+
+
+class Worker:
+    def __init__(self, concurrency=None, poll_interval=None):
+        options = config()
+        self.concurrency = concurrency or options['CONCURRENCY']
+        self.poll_interval = poll_interval if poll_interval is not None else options['POLL_INTERVAL']
+        self.stopped = False
+
+    def run(self, burst=False):
+        self.requeue_stale()
+        if self.concurrency == 1:
+            return self._run_inline(burst)
+
+        processed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='jobs') as pool:
+            while not self.stopped:
+                jobs = self.claim(self.concurrency - len(running))
+                running.update(pool.submit(self._execute_in_thread, job) for job in jobs)
+                processed += len(jobs)
+
+                if not running:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                _, running = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+        return processed
+
+    def _run_inline(self, burst):
+        processed = 0
+        while not self.stopped:
+            jobs = self.claim(1)
+            if not jobs:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.execute(jobs[0])
+            processed += 1
+        return processed
+
+    def claim(self, limit):
+        if limit <= 0:
+            return []
+
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status='queued', run_at__lte=now)
+                .order_by('run_at', 'id')
+                .values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=ids).update(
+                status='running',
+                started_at=now,
+                attempts=F('attempts') + 1
+            )
+        return list(Job.objects.filter(pk__in=ids).order_by('run_at', 'id'))
+
+    def requeue_stale(self):
+        # Jobs left ``running`` by a worker that died
+        cutoff = timezone.now() - timedelta(seconds=config()['STALE_AFTER'])
+        for job in Job.objects.filter(status='running', started_at__lt=cutoff):
+            job.status = 'queued'
+            _save_queued(job)
+
+    def execute(self, job):
+        handler = _registry.get(job.name)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job '{job.name}'")
+            with use_primary():
+                handler(**job.payload)
+        except Exception as exc:
+            logger.warning('Job %s (%s) failed: %r', job.pk, job.name, exc)
+            self.fail(job, exc)
+        else:
+            job.delete()
+
+    def fail(self, job, exc):
+        job.last_error = repr(exc)
+        if job.attempts < job.max_attempts:
+            backoff = config()['RETRY_BACKOFF'] * (2 ** (job.attempts - 1))
+            job.status = 'queued'
+            job.run_at = timezone.now() + timedelta(seconds=backoff)
+            _save_queued(job)
+        else:
+            job.status = 'failed'
+            job.save(update_fields=['status', 'last_error'])
+
+    def _execute_in_thread(self, job):
+        try:
+            self.execute(job)
+        finally:
+            close_old_connections()
+
+
+def _save_queued(job):
+    try:
+        with transaction.atomic():
+            job.save(update_fields=['status', 'run_at', 'last_error'])
+    except IntegrityError:
+        # A newer job with the same idempotency key is already queued
+        job.delete()
+
+
+def _run_eagerly(name, payload):
+    try:
+        with use_primary():
+            _registry[name](**payload)
+    except Exception:
+        logger.exception('Job %s failed', name)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from properties import images
+from properties.models import Profile, Property
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for existing property and profile images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that already exist'
+        )
+
+    def handle(self, *args, **options):
+        files = [prop.image_path for prop in Property.objects.exclude(image_path='').only('image_path')]
+        files += [profile.image for profile in Profile.objects.exclude(image='').only('image')]
+
+        created = failed = 0
+        for field_file in files:
+            if not images.is_local(field_file):
+                continue
+            try:
+                created += len(images.generate_variants(
+                    field_file.storage,
+                    field_file.name,
+                    force=options['force']
+                ))
+                images.mark_ready(field_file.name)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                self.stderr.write(f'{field_file.name}: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {created} image variants ({failed} images failed).'
+        ))
@@ -0,0 +1,123 @@
+import json
+import subprocess
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from properties import benchmark
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+# Latency percentiles and queries per request of the scripted API scenarios
+# (properties/benchmark.py) against the configured database; seed it first
+# with ``manage.py seed_data``. ``--output`` stores the results as JSON and
+# ``--compare`` diffs them against an earlier run. The checkout scenario
+# writes purchases.
+class Command(BaseCommand):
+    help = 'Benchmark the REST API scenarios and report p50/p95/p99 and queries per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', choices=benchmark.SCENARIOS, action='append')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the request mix')
+        parser.add_argument('--base-url', help='Run against a server (e.g. http://127.0.0.1:8000)')
+        parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache')
+        parser.add_argument('--output', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+        parser.add_argument('--threshold', type=float, default=10.0, help='Allowed latency increase, %%')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['base_url'] and options['no_cache']:
+            raise CommandError('--no-cache only applies to in-process runs.')
+        try:
+            dataset = benchmark.Dataset()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        results = {
+            'meta': {
+                'commit': self.git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'database': settings.DATABASES['default']['ENGINE'],
+                'target': options['base_url'] or 'test-client',
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'cache': not options['no_cache'],
+                'dataset': dataset.counts(),
+            },
+            'scenarios': {},
+        }
+        transport = (
+            benchmark.HTTPTransport(options['base_url']) if options['base_url']
+            else benchmark.ClientTransport()
+        )
+
+        self.stdout.write(
+            f"{'scenario':<10}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'queries':>9}{'errors':>8}"
+        )
+        with override_settings(CACHES=NO_CACHE) if options['no_cache'] else nullcontext():
+            for name in options['scenario'] or benchmark.SCENARIOS:
+                result = benchmark.run_scenario(
+                    name,
+                    dataset,
+                    transport,
+                    requests=options['requests'],
+                    concurrency=options['concurrency'],
+                    warmup=options['warmup'],
+                    seed=options['seed']
+                )
+                results['scenarios'][name] = result
+                self.report(name, result)
+
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                json.dump(results, target, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare']) as source:
+                baseline = json.load(source)
+            regressions = self.compare(baseline, results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"Regressions: {', '.join(regressions)}")
+
+    def report(self, name, result):
+        queries = result['queries_per_request']
+        self.stdout.write(
+            f"{name:<10}{result['throughput']:>9.0f}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+            f"{result['p99_ms']:>9.1f}{'-' if queries is None else queries:>9}{result['errors']:>8}"
+        )
+        for sample in result['error_samples']:
+            self.stderr.write(f'  {name}: {sample}')
+
+    def compare(self, baseline, results, threshold):
+        self.stdout.write(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'}:")
+        for key in ('target', 'concurrency', 'cache', 'dataset'):
+            if baseline['meta'].get(key) != results['meta'][key]:
+                self.stdout.write(self.style.WARNING(f'Baseline {key} differs: {baseline["meta"].get(key)}'))
+        regressions = []
+        for name, rows in benchmark.compare(baseline, results, threshold).items():
+            for metric, (old, new, change, regressed) in rows.items():
+                flag = '  REGRESSION' if regressed else ''
+                change = 'n/a' if change is None else f'{change:+.1f}%'
+                self.stdout.write(f'{name:<10}{metric:<21}{old:>10} -> {new:<10}{change}{flag}')
+                if regressed:
+                    regressions.append(f'{name} {metric}')
+        return regressions
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
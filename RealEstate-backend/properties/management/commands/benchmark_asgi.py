@@ -0,0 +1,142 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+# Each sync endpoint and its async (/api/async/) counterpart
+ENDPOINTS = {
+    'featured': ('/api/properties/featured/', '/api/async/featured/'),
+    'list': ('/api/properties/?page_size=20', '/api/async/properties/?page_size=20'),
+    'categories': ('/api/categories/', '/api/async/categories/'),
+}
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+# Throughput of the catalogue read path through the WSGI handler (one
+# request per worker thread) vs. the ASGI handler with the async views (one
+# event loop, many requests in flight), called in-process so no server is
+# needed. Runs against the configured database.
+class Command(BaseCommand):
+    help = 'Compare WSGI (sync views) and ASGI (async views) read throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=ENDPOINTS, action='append')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads')
+        parser.add_argument('--concurrency', type=int, default=32, help='ASGI requests in flight')
+        parser.add_argument('--no-cache', action='store_true', help='Bypass the response cache')
+
+    def handle(self, *args, **options):
+        endpoints = options['endpoint'] or list(ENDPOINTS)
+        self.stdout.write(
+            f"{options['requests']} requests per run, {options['workers']} WSGI threads, "
+            f"{options['concurrency']} ASGI in flight\n"
+        )
+        self.stdout.write(f"{'endpoint':<12}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+
+        with override_settings(CACHES=NO_CACHE) if options['no_cache'] else nullcontext():
+            for endpoint in endpoints:
+                sync_path, async_path = ENDPOINTS[endpoint]
+                for server, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                    path = sync_path if server == 'wsgi' else async_path
+                    run(path, options)  # warm up connections and caches
+                    elapsed, latencies, errors = run(path, options)
+                    self.report(endpoint, server, elapsed, latencies, errors)
+
+    def report(self, endpoint, server, elapsed, latencies, errors):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{endpoint:<12}{server:<8}{len(latencies) / elapsed:>10.0f}"
+            f"{statistics.median(latencies or [0]) * 1000:>10.1f}{p95 * 1000:>10.1f}{errors:>8}"
+        )
+
+    def run_wsgi(self, path, options):
+        handler = WSGIHandler()
+        url = urlsplit(path)
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def call(_):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': url.path,
+                'QUERY_STRING': url.query,
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'HTTP_HOST': 'localhost',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            statuses = []
+            start = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            b''.join(response)
+            response.close()
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                if not statuses[0].startswith('200'):
+                    errors.append(statuses[0])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            list(pool.map(call, range(options['requests'])))
+        return time.perf_counter() - start, latencies, len(errors)
+
+    def run_asgi(self, path, options):
+        return asyncio.run(self._run_asgi(path, options))
+
+    async def _run_asgi(self, path, options):
+        handler = ASGIHandler()
+        url = urlsplit(path)
+        latencies, errors = [], []
+        slots = asyncio.Semaphore(options['concurrency'])
+
+        async def call():
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': url.path,
+                'query_string': url.query.encode(),
+                'headers': [(b'host', b'localhost')],
+                'server': ('localhost', 80),
+            }
+            disconnect = asyncio.Event()
+            received = []
+
+            async def receive():
+                if not received:
+                    received.append(True)
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            statuses = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with slots:
+                start = time.perf_counter()
+                await handler(scope, receive, send)
+                latencies.append(time.perf_counter() - start)
+                disconnect.set()
+            if statuses[0] != 200:
+                errors.append(statuses[0])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(options['requests'])))
+        return time.perf_counter() - start, latencies, len(errors)
@@ -0,0 +1,110 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from backend import sqlite_tuning
+
+
+# Concurrent read/write throughput of a scratch SQLite database, with the
+# stock connection behaviour vs. the tuning profile from settings.py.
+class Command(BaseCommand):
+    help = 'Compare SQLite throughput with default settings vs. the tuned profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--rows', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        profiles = [
+            ('default', {'persistent': False, 'pragmas': {}, 'immediate': False}),
+            ('tuned', {'persistent': True, 'pragmas': sqlite_tuning.PRAGMAS, 'immediate': True}),
+        ]
+
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, "
+            f"{options['seconds']}s per profile\n"
+        )
+        self.stdout.write(f"{'profile':<10}{'reads/s':>12}{'writes/s':>12}{'locked':>10}")
+
+        for name, profile in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.seed(path, options['rows'])
+                result = self.run_profile(path, profile, options)
+
+            self.stdout.write(
+                f"{name:<10}{result['reads'] / options['seconds']:>12.0f}"
+                f"{result['writes'] / options['seconds']:>12.0f}{result['locked']:>10}"
+            )
+
+    def seed(self, path, rows):
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT, price REAL, hits INTEGER)')
+        conn.execute('CREATE TABLE event (id INTEGER PRIMARY KEY, item_id INTEGER, created REAL)')
+        conn.executemany(
+            'INSERT INTO item (name, price, hits) VALUES (?, ?, 0)',
+            ((f'item {index}', random.uniform(1000, 900000)) for index in range(rows))
+        )
+        conn.commit()
+        conn.close()
+
+    def run_profile(self, path, profile, options):
+        counters = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['seconds']
+
+        def connect():
+            conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+            for pragma, value in profile['pragmas'].items():
+                conn.execute(f'PRAGMA {pragma}={value}')
+            return conn
+
+        def read(conn):
+            start = random.randint(1, options['rows'])
+            conn.execute('SELECT * FROM item WHERE id >= ? ORDER BY id LIMIT 20', (start,)).fetchall()
+
+        def write(conn):
+            item_id = random.randint(1, options['rows'])
+            conn.execute('BEGIN IMMEDIATE' if profile['immediate'] else 'BEGIN')
+            try:
+                conn.execute('SELECT hits FROM item WHERE id = ?', (item_id,)).fetchone()
+                conn.execute('UPDATE item SET hits = hits + 1 WHERE id = ?', (item_id,))
+                conn.execute('INSERT INTO event (item_id, created) VALUES (?, ?)', (item_id, time.time()))
+                conn.execute('COMMIT')
+            except sqlite3.OperationalError:
+                conn.execute('ROLLBACK')
+                raise
+
+        def worker(operation, counter):
+            conn = connect() if profile['persistent'] else None
+            done = locked = 0
+            while time.monotonic() < deadline:
+                current = conn or connect()
+                try:
+                    operation(current)
+                    done += 1
+                except sqlite3.OperationalError:
+                    locked += 1
+                finally:
+                    if conn is None:
+                        current.close()
+            if conn is not None:
+                conn.close()
+            with lock:
+                counters[counter] += done
+                counters['locked'] += locked
+
+        threads = [threading.Thread(target=worker, args=(read, 'reads')) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=(write, 'writes')) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counters
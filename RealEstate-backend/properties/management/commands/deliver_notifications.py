@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from properties import notifications
+
+
+class Command(BaseCommand):
+    help = 'Deliver notifications still pending (queue overflow, restarts, retries)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        sent = notifications.deliver_pending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Delivered {sent} notifications.'))
@@ -0,0 +1,23 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from properties import bulk
+from properties.models import Property
+
+
+class Command(BaseCommand):
+    help = 'Export all properties as CSV or NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=bulk.FORMATS, default='csv', dest='file_format')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+
+    def handle(self, *args, **options):
+        lines = bulk.export_lines(Property.objects.all(), options['file_format'])
+        if not options['output']:
+            sys.stdout.writelines(lines)
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as target:
+            target.writelines(lines)
@@ -0,0 +1,38 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from properties import bulk
+
+
+class Command(BaseCommand):
+    help = 'Import properties from a CSV or NDJSON file in validated batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=bulk.FORMATS, dest='file_format')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--user', help='Username recorded as added_by')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        file_format = options['file_format'] or bulk.infer_format(options['path'])
+        with open(options['path'], 'rb') as source:
+            report = bulk.import_properties(
+                bulk.read_rows(source, file_format),
+                user=user,
+                batch_size=options['batch_size']
+            )
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} properties, {report['failed']} rows failed."
+        ))
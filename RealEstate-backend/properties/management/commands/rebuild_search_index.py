@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from properties import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text property search index from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.is_enabled():
+            self.stdout.write('Full-text index is only used on SQLite; nothing to do.')
+            return
+
+        search.rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from properties import cache as response_cache
+from properties import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored popularity score behind the popular feed (run periodically)'
+
+    def handle(self, *args, **options):
+        updated = counters.refresh_popularity()
+        if updated:
+            response_cache.invalidate(response_cache.PROPERTIES, response_cache.FEATURED)
+        self.stdout.write(self.style.SUCCESS(f'Updated popularity score of {updated} properties.'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from properties import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs (thumbnails, search indexing, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, help='Worker threads (default: JOBS["CONCURRENCY"])')
+        parser.add_argument('--poll-interval', type=float)
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+
+    def handle(self, *args, **options):
+        # Several runworker processes may share one database; claims are atomic
+        worker = jobs.Worker(
+            concurrency=options['concurrency'],
+            poll_interval=options['poll_interval']
+        )
+        self.stdout.write(f'Worker started with {worker.concurrency} threads')
+        try:
+            processed = worker.run(burst=options['burst'])
+        except KeyboardInterrupt:
+            worker.stopped = True
+            return
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs.'))
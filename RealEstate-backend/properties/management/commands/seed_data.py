@@ -0,0 +1,38 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from properties import benchmark
+
+
+class Command(BaseCommand):
+    help = 'Seed categories, properties, users, favorites, purchases and comments with bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--properties', type=int, default=5000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--favorites', type=int, default=20000)
+        parser.add_argument('--purchases', type=int, default=5000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, help='Random seed, for a reproducible dataset')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        created = benchmark.seed(
+            categories=options['categories'],
+            properties=options['properties'],
+            users=options['users'],
+            favorites=options['favorites'],
+            purchases=options['purchases'],
+            comments=options['comments'],
+            batch_size=options['batch_size'],
+            rng=random.Random(options['seed'])
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {summary} in {time.perf_counter() - start:.1f}s.'
+        ))
+        self.stdout.write(f'Seeded users log in with password "{benchmark.PASSWORD}".')
@@ -0,0 +1,289 @@
+import bisect
+import heapq
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+# Per-endpoint request metrics.
+#
+# MetricsMiddleware times every request and labels it with the resolved URL
+# name. A database execute wrapper, installed on each connection when it
+# opens (signals.py), counts and times the queries of the request that is
+# running in the current context, including queries the async views run in
+# worker threads. Root serializers that use TimedSerializerMixin add the time
+# spent building their ``.data``, and DRF responses get the time spent
+# rendering that data to bytes, as two separate figures. Everything is
+# aggregated in-process into fixed-bucket histograms, exposed in the
+# Prometheus text format by /api/admin/metrics/ (one set per process).
+# Requests slower than METRICS['SLOW_REQUEST_MS'] are logged with their most
+# expensive SQL statements.
+
+_current = ContextVar('metrics_request', default=None)
+
+
+def config():
+    return {
+        'ENABLED': True,
+        'SLOW_REQUEST_MS': 1000,
+        'SLOW_REQUEST_TOP_SQL': 5,
+        **getattr(settings, 'METRICS', {}),
+    }
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def exposition(self, label_names):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, (counts, total) in sorted(self.series.items()):
+            base = _labels(label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{{base}}} {total:.6f}'
+            yield f'{self.name}_count{{{base}}} {cumulative}'
+
+
+class Registry:
+    LABELS = ('view', 'method')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = {}
+            self.histograms = {
+                'duration': Histogram(
+                    'http_request_duration_seconds', 'Wall time of the request.', SECONDS_BUCKETS
+                ),
+                'queries': Histogram(
+                    'http_request_db_queries', 'Database queries run by the request.', QUERY_BUCKETS
+                ),
+                'db': Histogram(
+                    'http_request_db_duration_seconds', 'Time spent in database queries.', SECONDS_BUCKETS
+                ),
+                'serialize': Histogram(
+                    'http_request_serialize_duration_seconds',
+                    'Time spent building serializer data (timed root serializers).',
+                    SECONDS_BUCKETS
+                ),
+                'render': Histogram(
+                    'http_request_render_duration_seconds',
+                    'Time spent rendering DRF responses to bytes, after serialization.',
+                    SECONDS_BUCKETS
+                ),
+                'bytes': Histogram(
+                    'http_response_size_bytes', 'Response body size (not streamed responses).', BYTES_BUCKETS
+                ),
+            }
+
+    def observe(self, view, method, status, record, duration, size):
+        labels = (view, method)
+        with self.lock:
+            key = labels + (str(status),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.histograms['duration'].observe(labels, duration)
+            self.histograms['queries'].observe(labels, record.queries)
+            self.histograms['db'].observe(labels, record.db_time)
+            if record.serialize_time is not None:
+                self.histograms['serialize'].observe(labels, record.serialize_time)
+            if record.render_time is not None:
+                self.histograms['render'].observe(labels, record.render_time)
+            if size is not None:
+                self.histograms['bytes'].observe(labels, size)
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP http_requests_total Requests handled, by view, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for labels, count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{{_labels(self.LABELS + ("status",), labels)}}} {count}')
+            for histogram in self.histograms.values():
+                lines.extend(histogram.exposition(self.LABELS))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestRecord:
+    __slots__ = (
+        'start', 'queries', 'db_time', 'statements', 'serialize_time', 'render_start', 'render_time'
+    )
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        # SQL text -> [executions, seconds]; parameters are not kept
+        self.statements = {}
+        self.serialize_time = None
+        self.render_start = None
+        self.render_time = None
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    record = _current.get()
+    if record is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        record.queries += 1
+        record.db_time += elapsed
+        statement = record.statements.get(sql)
+        if statement is None:
+            record.statements[sql] = [1, elapsed]
+        else:
+            statement[0] += 1
+            statement[1] += elapsed
+
+
+class TimedSerializerMixin:
+    # For root serializers: times ``.data``, where to_representation runs.
+    # Nested serializers are counted in their root's time.
+    @property
+    def data(self):
+        record = _current.get()
+        if record is None or self.parent is not None:
+            return super().data
+
+        start = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            record.serialize_time = (record.serialize_time or 0.0) + time.perf_counter() - start
+
+
+def install(connection):
+    # Innermost position: connection.execute_wrapper() blocks pop the last
+    # wrapper, so one that was open when the connection was made stays intact
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, execute_wrapper)
+
+
+def top_statements(record, limit):
+    # [(sql, executions, seconds)] by total time, so N+1 patterns show up
+    top = heapq.nlargest(limit, record.statements.items(), key=lambda item: item[1][1])
+    return [(sql, count, elapsed) for sql, (count, elapsed) in top]
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.route or 'unnamed'
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not config()['ENABLED']:
+            return self.get_response(request)
+
+        record = RequestRecord()
+        token = _current.set(record)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, record)
+        return response
+
+    async def __acall__(self, request):
+        if not config()['ENABLED']:
+            return await self.get_response(request)
+
+        record = RequestRecord()
+        token = _current.set(record)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, record)
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before a DRF Response is rendered
+        record = _current.get()
+        if record is not None:
+            record.render_start = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: _rendered(record))
+        return response
+
+    def finish(self, request, response, record):
+        duration = time.perf_counter() - record.start
+        view = view_name(request)
+        size = None if response.streaming else len(response.content)
+        registry.observe(view, request.method, response.status_code, record, duration, size)
+
+        options = config()
+        slow_ms = options['SLOW_REQUEST_MS']
+        if slow_ms is not None and duration * 1000 >= slow_ms:
+            log_slow_request(request, view, response, record, duration, options['SLOW_REQUEST_TOP_SQL'])
+
+
+def log_slow_request(request, view, response, record, duration, limit):
+    lines = [
+        f'Slow request: {request.method} {request.get_full_path()} ({view}) -> '
+        f'{response.status_code} in {duration * 1000:.1f}ms, '
+        f'{record.queries} queries in {record.db_time * 1000:.1f}ms'
+    ]
+    for sql, count, elapsed in top_statements(record, limit):
+        lines.append(f'  {elapsed * 1000:8.1f}ms  x{count:<4} {sql}')
+    logger.warning('\n'.join(lines))
+
+
+def _rendered(record):
+    record.render_time = time.perf_counter() - record.render_start
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0016_comment'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='property',
+            name='is_favorite',
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='transaction_type',
+            field=models.CharField(choices=[('sale', 'Sale'), ('rent', 'Rent')], default='sale', max_length=50),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-17 07:04
+
+import django.db.models.deletion
+import properties.models
+from django.db import migrations, models
+
+
+def create_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS properties_property_search USING fts5("
+        "name, location, type, category, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO properties_property_search (rowid, name, location, type, category) "
+        "SELECT p.id, p.name, p.location, p.type, c.name "
+        "FROM properties_property p INNER JOIN properties_category c ON c.id = p.category_id"
+    )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS properties_property_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0017_remove_property_is_favorite_alter_property_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertySearchEntry',
+            fields=[
+                ('property', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='properties.property')),
+                ('name', models.TextField()),
+                ('location', models.TextField()),
+                ('type', models.TextField()),
+                ('category', models.TextField()),
+                ('document', properties.models.FullTextField(db_column='properties_property_search', editable=False)),
+                ('rank', models.FloatField(editable=False)),
+            ],
+            options={
+                'db_table': 'properties_property_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
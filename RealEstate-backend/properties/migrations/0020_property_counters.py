@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-17 07:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    Comment = apps.get_model('properties', 'Comment')
+    Purchase = apps.get_model('properties', 'Purchase')
+    Favorite = Property.favorites.through
+
+    def total(model, aggregate):
+        return Coalesce(Subquery(
+            model.objects.filter(property_id=OuterRef('pk'))
+            .order_by().values('property_id').annotate(total=aggregate).values('total')
+        ), 0)
+
+    Property.objects.update(
+        favorites_count=total(Favorite, Count('pk')),
+        comments_count=total(Comment, Count('pk')),
+        purchases_count=total(Purchase, Sum('quantity')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0019_property_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='purchases_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
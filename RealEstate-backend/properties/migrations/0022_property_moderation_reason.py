@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0021_property_timestamps_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='moderation_reason',
+            field=models.TextField(blank=True, default=''),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 07:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0022_property_moderation_reason'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['property', 'created_at'], name='comment_property_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-17 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0025_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='variants_source',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='variants_source',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
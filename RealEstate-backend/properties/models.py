@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Lookup
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 # User profile model (extends Django's built-in User model)
@@ -7,6 +9,36 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     phone = models.CharField(max_length=20, blank=True)
     image = models.ImageField(upload_to='profile_images/', blank=True, null=True)
+    # Image name whose variants exist (images.py); stale once the image changes
+    variants_source = models.CharField(max_length=100, blank=True, default='')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._tracked_values()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = self._tracked_values()
+
+    def changed_fields(self):
+        # Fields that differ from what was loaded (all of them if unsaved)
+        current = self._tracked_values()
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return list(current)
+        return [name for name, value in current.items() if loaded.get(name) != value]
+
+    def _tracked_values(self):
+        # Deferred fields are left out rather than loaded
+        values = {}
+        if 'phone' in self.__dict__:
+            values['phone'] = self.phone
+        if 'image' in self.__dict__:
+            # A new upload is uncommitted even if it reuses the stored name
+            values['image'] = (self.image.name or '', self.image._committed)
+        return values
 
     def __str__(self):
         return self.user.username
@@ -21,6 +53,22 @@ class Category(models.Model):
         return self.name
 
 
+class PropertyQuerySet(models.QuerySet):
+    def for_listing(self):
+        # Everything PropertySerializer emits, loaded in a fixed number of
+        # queries regardless of how many properties are returned.
+        property_fields = [field.name for field in self.model._meta.concrete_fields]
+        return self.select_related('category', 'added_by').only(
+            *property_fields,
+            'category__name',
+            'category__icon',
+            'added_by__username',
+            'added_by__first_name',
+        ).prefetch_related(
+            models.Prefetch('favorites', queryset=User.objects.only('id'))
+        )
+
+
 # Property model
 class Property(models.Model):
     STATUS_CHOICES = [
@@ -36,6 +84,8 @@ class Property(models.Model):
 
     name = models.CharField(max_length=255)
     image_path = models.ImageField(upload_to='property_images/', blank=True, null=True)
+    # Image name whose variants exist (images.py); stale once the image changes
+    variants_source = models.CharField(max_length=100, blank=True, default='')
     type = models.CharField(max_length=100)
     location = models.CharField(max_length=255)
     price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -63,6 +113,8 @@ class Property(models.Model):
         choices=STATUS_CHOICES,
         default='pending'
     )
+    # Why an admin approved or rejected the listing (see moderation.py)
+    moderation_reason = models.TextField(blank=True, default='')
     added_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -71,6 +123,40 @@ class Property(models.Model):
         related_name='added_properties'
     )
 
+    # Denormalized counters, maintained by properties/counters.py
+    favorites_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    purchases_count = models.PositiveIntegerField(default=0)
+
+    # Precomputed ranking for the "popular" feed (counters.refresh_popularity)
+    popularity_score = models.FloatField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PropertyQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored price so a save can detect a price drop
+        if 'price' in instance.__dict__:
+            instance._loaded_price = instance.price
+        return instance
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'category'], name='property_status_category_idx'),
+            models.Index(fields=['status', 'is_featured'], name='property_status_featured_idx'),
+            models.Index(fields=['status', 'price'], name='property_status_price_idx'),
+            models.Index(
+                fields=['status', 'transaction_type', 'price'],
+                name='property_status_txn_price_idx'
+            ),
+            models.Index(fields=['status', 'created_at'], name='property_status_created_idx'),
+            models.Index(fields=['status', 'popularity_score'], name='property_status_popular_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -79,6 +165,18 @@ class Property(models.Model):
             return False
         return self.favorites.filter(id=user.id).exists()
 
+    @classmethod
+    def favorite_ids_for(cls, user, property_ids):
+        # One query for a whole page instead of ``is_favorite_for`` per row
+        if not user or not user.is_authenticated:
+            return set()
+        return set(
+            cls.favorites.through.objects.filter(
+                user_id=user.id,
+                property_id__in=list(property_ids)
+            ).values_list('property_id', flat=True)
+        )
+
 
 # Purchase model
 class Purchase(models.Model):
@@ -102,6 +200,19 @@ class Purchase(models.Model):
 
 
 # Comment / review model
+class CommentQuerySet(models.QuerySet):
+    def for_listing(self):
+        # What CommentSerializer emits, newest first, with the user joined
+        return self.select_related('user').only(
+            'id',
+            'property_id',
+            'content',
+            'created_at',
+            'user__username',
+            'user__first_name',
+        ).order_by('-created_at', '-id')
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     property = models.ForeignKey(
@@ -112,5 +223,126 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Newest-first comments of one property (CommentCursorPagination)
+            models.Index(fields=['property', 'created_at'], name='comment_property_created_idx'),
+        ]
+
     def __str__(self):
         return f'{self.user.username}: {self.content[:30]}'
+
+
+# Notification to one user; rows of one send share a job_id
+class Notification(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    job_id = models.UUIDField(db_index=True)
+    message = models.TextField()
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='notification_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.message[:30]}'
+
+
+# Background job, run by ``manage.py runworker`` (see jobs.py)
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='queued'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+        ]
+        constraints = [
+            # At most one queued job per key; once it starts, a new one may queue
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idempotency_key'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+# Full-text search index (SQLite FTS5 virtual table, created in migration 0018)
+class FullTextField(models.TextField):
+    pass
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class PropertySearchEntry(models.Model):
+    property = models.OneToOneField(
+        Property,
+        on_delete=models.DO_NOTHING,
+        db_column='rowid',
+        db_constraint=False,
+        primary_key=True,
+        related_name='search_entry'
+    )
+    name = models.TextField()
+    location = models.TextField()
+    type = models.TextField()
+    category = models.TextField()
+
+    # FTS5 hidden columns: the table-named column is the MATCH target and
+    # ``rank`` is the bm25 score of the current MATCH (lower is better).
+    document = FullTextField(db_column='properties_property_search', editable=False)
+    rank = models.FloatField(editable=False)
+
+    class Meta:
+        managed = False
+        db_table = 'properties_property_search'
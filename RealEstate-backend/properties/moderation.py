@@ -0,0 +1,58 @@
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Property
+
+ACTIONS = {
+    'approve': 'approved',
+    'reject': 'rejected',
+}
+
+# Sent once per moderate() call, after the UPDATE, with every changed id:
+# sender=Property, property_ids, status, reason, moderator.
+properties_moderated = Signal()
+
+
+# Bulk approve / reject of listings.
+#
+# One UPDATE ... WHERE id IN (...) replaces a save() per property, so no
+# per-row post_save fires; consumers that need to react (response cache,
+# notifications, ...) listen to ``properties_moderated`` instead.
+
+def moderate(property_ids, status, reason='', moderator=None):
+    property_ids = set(property_ids)
+
+    with transaction.atomic():
+        current = Property.objects.filter(pk__in=property_ids).values_list(
+            'pk', 'status', 'moderation_reason'
+        )
+        found = set()
+        changed = []
+        for pk, current_status, current_reason in current:
+            found.add(pk)
+            # Rows already in the requested state are left alone
+            if (current_status, current_reason) != (status, reason):
+                changed.append(pk)
+
+        if changed:
+            Property.objects.filter(pk__in=changed).update(
+                status=status,
+                moderation_reason=reason,
+                # update() bypasses auto_now
+                updated_at=timezone.now()
+            )
+            properties_moderated.send(
+                sender=Property,
+                property_ids=changed,
+                status=status,
+                reason=reason,
+                moderator=moderator
+            )
+
+    return {
+        'status': status,
+        'updated': len(changed),
+        'unchanged': len(found) - len(changed),
+        'not_found': sorted(property_ids - found),
+    }
@@ -0,0 +1,239 @@
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import jobs
+from .models import Job, Notification, Property
+
+logger = logging.getLogger(__name__)
+
+
+# User notifications (push/email/...).
+#
+# A send only enqueues a fan-out job (jobs.py) and returns its job id. The
+# fan-out creates one Notification row per recipient and hands the row ids
+# in batches to delivery jobs, which send them through the configured
+# transport. Failed deliveries are retried with exponential backoff. Rows
+# that are still ``pending`` for any other reason are sent by
+# ``manage.py deliver_notifications``.
+
+def config():
+    return {
+        'TRANSPORT': 'properties.notifications.ConsoleTransport',
+        'BATCH_SIZE': 100,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BACKOFF': 2.0,
+        **getattr(settings, 'NOTIFICATIONS', {}),
+    }
+
+
+# Transports: ``send_batch(notifications)`` delivers a list of Notification
+# rows (user joined) and returns the ids that failed; raising fails them all.
+class ConsoleTransport:
+    def send_batch(self, notifications):
+        for notification in notifications:
+            logger.info('Notification to user %s: %s', notification.user_id, notification.message)
+        return []
+
+
+class LocmemTransport:
+    # Keeps delivered notifications in ``outbox``, for tests
+    outbox = []
+
+    def send_batch(self, notifications):
+        LocmemTransport.outbox.extend(notifications)
+        return []
+
+
+def get_transport():
+    return import_string(config()['TRANSPORT'])()
+
+
+# Recipient segments for fan-out; each returns a queryset of user ids
+def favorited_by(property_id):
+    return Property.favorites.through.objects.filter(
+        property_id=property_id
+    ).values_list('user_id', flat=True)
+
+
+def purchased_by(property_id):
+    return User.objects.filter(
+        purchases__property_id=property_id
+    ).values_list('id', flat=True).distinct()
+
+
+def all_users(property_id=None):
+    return User.objects.filter(is_active=True).values_list('id', flat=True)
+
+
+SEGMENTS = {
+    'favorited': favorited_by,
+    'purchased': purchased_by,
+    'all': all_users,
+}
+
+
+def send(message, user_ids=None, segment=None, property_id=None):
+    # Recipients are ``user_ids`` or a segment of SEGMENTS; resolved by the
+    # fan-out job after commit. Returns the job id, which groups the
+    # Notification rows; it is not a jobs.Job id.
+    job_id = uuid.uuid4()
+    jobs.enqueue(
+        'notifications.fan_out',
+        {
+            'job_id': str(job_id),
+            'message': message,
+            'user_ids': list(user_ids) if user_ids is not None else None,
+            'segment': segment,
+            'property_id': property_id,
+        },
+        idempotency_key=_fan_out_key(job_id)
+    )
+    return job_id
+
+
+@jobs.job('notifications.fan_out')
+def fan_out(job_id, message, user_ids=None, segment=None, property_id=None):
+    if user_ids is None:
+        user_ids = SEGMENTS[segment](property_id)
+    return notify(user_ids, message, uuid.UUID(job_id))
+
+
+def notify(user_ids, message, job_id):
+    # Creates the rows and their delivery jobs in one transaction; returns
+    # the recipient count
+    batch_size = config()['BATCH_SIZE']
+    batches = []
+
+    with transaction.atomic():
+        pending = []
+        for user_id in user_ids.iterator() if hasattr(user_ids, 'iterator') else user_ids:
+            pending.append(Notification(user_id=user_id, job_id=job_id, message=message))
+            if len(pending) >= batch_size:
+                batches.append(_create(pending))
+                pending = []
+        if pending:
+            batches.append(_create(pending))
+
+        for ids in batches:
+            enqueue(ids)
+
+    return sum(len(ids) for ids in batches)
+
+
+def notify_price_drop(prop, old_price):
+    message = f'Price drop: {prop.name} is now {prop.price} (was {old_price})'
+    return send(message, segment='favorited', property_id=prop.pk)
+
+
+def job_status(job_id):
+    counts = dict.fromkeys(dict(Notification.STATUS_CHOICES), 0)
+    rows = Notification.objects.filter(job_id=job_id).values('status').annotate(total=Count('id'))
+    for row in rows:
+        counts[row['status']] = row['total']
+    return counts
+
+
+def fan_out_pending(job_id):
+    # True until the fan-out job has created the rows or given up
+    return Job.objects.filter(
+        idempotency_key=_fan_out_key(job_id),
+        status__in=('queued', 'running')
+    ).exists()
+
+
+def fan_out_error(job_id):
+    # last_error of a fan-out job that ran out of attempts, else None
+    return Job.objects.filter(
+        idempotency_key=_fan_out_key(job_id),
+        status='failed'
+    ).values_list('last_error', flat=True).first()
+
+
+def _fan_out_key(job_id):
+    return f'notifications-fan-out:{job_id}'
+
+
+def _create(notifications):
+    return [notification.pk for notification in Notification.objects.bulk_create(notifications)]
+
+
+def enqueue(notification_ids, attempt=1, delay=0):
+    jobs.enqueue(
+        'notifications.deliver',
+        {'notification_ids': list(notification_ids), 'attempt': attempt},
+        run_at=timezone.now() + timedelta(seconds=delay)
+    )
+
+
+@jobs.job('notifications.deliver')
+def deliver(notification_ids, attempt=1, retry=True):
+    # Delivers one batch; returns the number sent
+    max_attempts = config()['MAX_ATTEMPTS']
+    notifications = list(
+        Notification.objects.filter(pk__in=notification_ids, status='pending').select_related('user')
+    )
+    if not notifications:
+        return 0
+
+    try:
+        failed = set(get_transport().send_batch(notifications))
+        error = 'Delivery failed'
+    except Exception as exc:
+        logger.warning('Notification transport failed: %r', exc)
+        failed = {notification.pk for notification in notifications}
+        error = str(exc) or exc.__class__.__name__
+
+    sent = [notification.pk for notification in notifications if notification.pk not in failed]
+    Notification.objects.filter(pk__in=sent).update(
+        status='sent',
+        sent_at=timezone.now(),
+        attempts=F('attempts') + 1
+    )
+
+    if failed:
+        # Rows out of attempts become ``failed``, the rest stay ``pending``
+        Notification.objects.filter(pk__in=failed).update(
+            status=Case(
+                When(attempts__gte=max_attempts - 1, then=Value('failed')),
+                default=Value('pending')
+            ),
+            attempts=F('attempts') + 1,
+            last_error=error
+        )
+        retryable = [
+            notification.pk for notification in notifications
+            if notification.pk in failed and notification.attempts + 1 < max_attempts
+        ]
+        if retry and retryable:
+            _retry(retryable, attempt)
+
+    return len(sent)
+
+
+def deliver_pending(batch_size=None):
+    # One synchronous pass over everything still pending; failures are left
+    # for the next pass instead of being retried here
+    batch_size = batch_size or config()['BATCH_SIZE']
+    sent, last_id = 0, 0
+    while True:
+        ids = list(
+            Notification.objects.filter(status='pending', pk__gt=last_id)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return sent
+        sent += deliver(ids, retry=False)
+        last_id = ids[-1]
+
+
+def _retry(notification_ids, attempt):
+    delay = config()['RETRY_BACKOFF'] * (2 ** (attempt - 1))
+    enqueue(notification_ids, attempt + 1, delay)
@@ -0,0 +1,247 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Keyset (cursor) pagination.
+#
+# Pages are addressed by the sort key of the last row seen instead of an
+# OFFSET, so page N costs the same single indexed range scan as page 1.
+# Pagination is opt-in: requests without ``cursor`` or ``page_size`` keep
+# receiving the plain, unpaginated list.
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Public ordering name -> model fields. The last field must be unique
+    # so that every row has a distinct position.
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+    }
+    default_ordering = 'id'
+
+    def get_page_size(self, request):
+        config = getattr(settings, 'CURSOR_PAGINATION', {})
+        page_size = config.get('PAGE_SIZE', 20)
+        max_page_size = config.get('MAX_PAGE_SIZE', 100)
+
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            pass
+
+        return max(1, min(page_size, max_page_size))
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return self._finish_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # Same as paginate_queryset, fetching the page with the async ORM
+        if not self.is_requested(request):
+            return None
+        return self._finish_page([row async for row in self._page_queryset(queryset, request)])
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request, queryset)
+        if cursor:
+            self.ordering, values, self.reverse = cursor
+        else:
+            self.ordering = request.query_params.get(self.ordering_query_param)
+            if self.ordering not in self.orderings:
+                self.ordering = self.default_ordering
+            values, self.reverse = None, False
+
+        fields = self.orderings[self.ordering]
+        if self.reverse:
+            fields = tuple(_flip(field) for field in fields)
+
+        queryset = queryset.order_by(*fields)
+        if values is not None:
+            queryset = queryset.filter(_keyset_filter(fields, values))
+        self.cursor = cursor
+        return queryset[:self.page_size + 1]
+
+    def _finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        if self.reverse:
+            self.has_next = bool(rows)
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and bool(rows)
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        # ``results`` goes last so clients can start consuming the cursors
+        # before the (large) result array has been fully received.
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('page_size', self.page_size),
+            ('results', data),
+        ])
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._build_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._build_link(self.page[0], reverse=True)
+
+    def _build_link(self, row, reverse):
+        fields = self.orderings[self.ordering]
+        values = [_encode_value(_row_value(row, field.lstrip('-'))) for field in fields]
+        payload = json.dumps({'o': self.ordering, 'k': values, 'r': reverse}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.ordering_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, queryset):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            ordering = payload['o']
+            values = payload['k']
+            reverse = bool(payload['r'])
+            fields = self.orderings[ordering]
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            # Key values are client input: parse them with the model fields
+            values = [
+                _decode_value(queryset, field.lstrip('-'), value)
+                for field, value in zip(fields, values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return ordering, values, reverse
+
+
+class PropertyCursorPagination(KeysetPagination):
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id'),
+        'newest': ('-created_at', '-id'),
+        'popular': ('-popularity_score', '-id'),
+        '-favorites_count': ('-favorites_count', '-id'),
+        '-comments_count': ('-comments_count', '-id'),
+        '-purchases_count': ('-purchases_count', '-id'),
+    }
+
+
+# Search results: by relevance (``search_rank``, annotated by search.search)
+# unless another ordering is requested
+class PropertySearchCursorPagination(PropertyCursorPagination):
+    orderings = {
+        **PropertyCursorPagination.orderings,
+        'rank': ('search_rank', 'id'),
+    }
+    default_ordering = 'rank'
+
+
+class PurchaseCursorPagination(KeysetPagination):
+    orderings = {
+        '-id': ('-id',),
+        'id': ('id',),
+    }
+    default_ordering = '-id'
+
+
+class CommentCursorPagination(KeysetPagination):
+    orderings = {
+        'newest': ('-created_at', '-id'),
+    }
+    default_ordering = 'newest'
+
+
+# Purchase history grouped by property (rows are ``values()`` dicts)
+class PurchaseGroupCursorPagination(KeysetPagination):
+    orderings = {
+        'property': ('property_id',),
+    }
+    default_ordering = 'property'
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+def _keyset_filter(fields, values):
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+    condition = Q()
+    for index, field in enumerate(fields):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[index]})
+        for previous, value in zip(fields[:index], values[:index]):
+            term &= Q(**{previous.lstrip('-'): value})
+        condition |= term
+    return condition
+
+
+def _decode_value(queryset, name, value):
+    if value is None or isinstance(value, (list, dict)):
+        raise ValueError(value)
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field.to_python(value)
+    try:
+        field = queryset.model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # A ``values()`` alias; compared as given
+        return value
+    return field.to_python(value)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
@@ -0,0 +1,71 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+# Sends reads of the models in settings.REPLICA_MODELS to one of
+# settings.REPLICA_DATABASES; everything else, and every write, goes to
+# ``default``. With no replicas configured it routes nothing.
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'REPLICA_DATABASES', [])
+        if not replicas or _pinned_to_primary.get():
+            return None
+        if model._meta.label_lower not in getattr(settings, 'REPLICA_MODELS', []):
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas are copies of ``default``, so any mix is the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'REPLICA_DATABASES', [])
+
+
+@contextmanager
+def use_primary():
+    # Read-your-writes: every query inside goes to ``default``. Also usable
+    # as a view decorator, ``@use_primary()``.
+    token = _pinned_to_primary.set(True)
+    try:
+        yield
+    finally:
+        _pinned_to_primary.reset(token)
+
+
+class PrimaryForWritesMiddleware:
+    # Requests that write (POST/PUT/PATCH/DELETE) read from ``default`` too,
+    # so validation and the response never see a lagging replica.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+        with use_primary():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        # Native async under ASGI, so async views are not pushed to a thread
+        if request.method in SAFE_METHODS:
+            return await self.get_response(request)
+        with use_primary():
+            return await self.get_response(request)
@@ -0,0 +1,128 @@
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+
+from . import jobs
+from .models import Category, Property, PropertySearchEntry
+
+
+# Full-text search over name, location, type and category name.
+#
+# On SQLite the index is an FTS5 virtual table (PropertySearchEntry) kept in
+# sync by background jobs scheduled from signals.py; other backends fall
+# back to icontains.
+
+TABLE = PropertySearchEntry._meta.db_table
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_enabled():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(query):
+    # Every term must match; each term is a prefix so "apa" finds "apartment"
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(queryset, query):
+    # Annotates ``search_rank`` (lower is more relevant) and orders by it, so
+    # keyset pages can continue from a rank (PropertySearchCursorPagination)
+    expression = build_match_expression(query)
+    if not expression:
+        return queryset.none()
+
+    if not is_enabled():
+        for token in TOKEN_RE.findall(query):
+            queryset = queryset.filter(
+                Q(name__icontains=token) |
+                Q(location__icontains=token) |
+                Q(type__icontains=token) |
+                Q(category__name__icontains=token)
+            )
+        # No relevance score without the index: ties everywhere, so id order
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by('id')
+
+    return queryset.filter(
+        search_entry__document__match=expression
+    ).annotate(search_rank=F('search_entry__rank')).order_by('search_rank', 'id')
+
+
+def index_properties(properties):
+    if not is_enabled():
+        return
+
+    rows = [
+        (prop.pk, prop.name, prop.location, prop.type, prop.category.name)
+        for prop in properties
+    ]
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, name, location, type, category) VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+
+def schedule_sync(property_ids):
+    property_ids = sorted(set(property_ids))
+    if not is_enabled() or not property_ids:
+        return
+    key = f'search-sync:{property_ids[0]}' if len(property_ids) == 1 else None
+    jobs.enqueue('search.sync', {'property_ids': property_ids}, idempotency_key=key)
+
+
+def schedule_category_sync(category_id):
+    if is_enabled():
+        jobs.enqueue(
+            'search.sync_category',
+            {'category_id': category_id},
+            idempotency_key=f'search-sync-category:{category_id}'
+        )
+
+
+@jobs.job('search.sync')
+def sync_properties(property_ids):
+    # Index what still exists, drop what has been deleted since
+    properties = list(Property.objects.select_related('category').filter(pk__in=property_ids))
+    index_properties(properties)
+    remove_properties(set(property_ids) - {prop.pk for prop in properties})
+
+
+@jobs.job('search.sync_category')
+def sync_category(category_id):
+    category = Category.objects.filter(pk=category_id).first()
+    if category is not None:
+        index_properties(category.properties.select_related('category'))
+
+
+def remove_properties(property_ids):
+    if not is_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk in property_ids])
+
+
+def rebuild_index(batch_size=1000):
+    if not is_enabled():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+    queryset = Property.objects.select_related('category').only(
+        'name', 'location', 'type', 'category__name'
+    ).order_by('id')
+    batch = []
+    for prop in queryset.iterator(chunk_size=batch_size):
+        batch.append(prop)
+        if len(batch) >= batch_size:
+            index_properties(batch)
+            batch = []
+    index_properties(batch)
@@ -1,7 +1,11 @@
 from django.contrib.auth.models import User
+from django.db import models
 from rest_framework import serializers
 from .models import Property, Category, Purchase, Profile
 from .models import Comment 
+from . import images
+from . import metrics
+from . import notifications
 #  Profile Serializer
 class ProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -39,10 +43,27 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+#  Property list serializer: resolves ``is_favorite`` for the whole page at once
+class PropertyListSerializer(metrics.TimedSerializerMixin, serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+
+        if 'favorite_ids' not in self.context:
+            request = self.context.get('request')
+            user = request.user if request else None
+            self.context['favorite_ids'] = Property.favorite_ids_for(
+                user,
+                [item.pk for item in items]
+            )
+
+        return super().to_representation(items)
+
+
 #  Property Serializer
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(metrics.TimedSerializerMixin, serializers.ModelSerializer):
     image_path = serializers.ImageField(required=False)
     is_favorite = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     name = serializers.CharField(required=False)
     type = serializers.CharField(required=False)
@@ -50,7 +71,6 @@ class PropertySerializer(serializers.ModelSerializer):
     price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     transaction_type = serializers.CharField(required=False)
     is_featured = serializers.BooleanField(required=False)
-    is_favorite = serializers.BooleanField(required=False)
     status = serializers.CharField(required=False)
 
     category_id = serializers.PrimaryKeyRelatedField(
@@ -64,13 +84,30 @@ class PropertySerializer(serializers.ModelSerializer):
     class Meta:
         model = Property
         fields = '__all__'
-        read_only_fields = ['added_by']
+        read_only_fields = [
+            'added_by',
+            'moderation_reason',
+            'favorites_count',
+            'comments_count',
+            'purchases_count',
+            'popularity_score',
+            'created_at',
+            'updated_at',
+        ]
+        list_serializer_class = PropertyListSerializer
 
     def get_is_favorite(self, obj):
+        favorite_ids = self.context.get('favorite_ids')
+        if favorite_ids is not None:
+            return obj.pk in favorite_ids
+
         request = self.context.get('request')
         user = request.user if request else None
         return obj.is_favorite_for(user) if user and user.is_authenticated else False
 
+    def get_image_variants(self, obj):
+        return images.variant_urls(obj.image_path, obj.variants_source, self.context.get('request'))
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
         image_field = instance.image_path
@@ -110,15 +147,31 @@ class PropertySerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+#  Cart list serializer: checks every property of the cart in one query
+class CartItemListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        property_ids = {item['property_id'] for item in attrs}
+        properties = Property.objects.in_bulk(property_ids)
+
+        missing = sorted(property_ids - properties.keys())
+        if missing:
+            raise serializers.ValidationError(
+                [f"Property {property_id} not found" for property_id in missing]
+            )
+
+        for item in attrs:
+            item['property'] = properties[item['property_id']]
+        return attrs
+
+
 #  Serializer for CartItem (Used in Checkout)
 class CartItemSerializer(serializers.Serializer):
     property_id = serializers.IntegerField()
-    quantity = serializers.IntegerField(min_value=1)
+    # Optional, as in the original checkout API
+    quantity = serializers.IntegerField(min_value=1, required=False, default=1)
 
-    def validate_property_id(self, value):
-        if not Property.objects.filter(id=value).exists():
-            raise serializers.ValidationError("This property does not exist.")
-        return value
+    class Meta:
+        list_serializer_class = CartItemListSerializer
 
     def validate_quantity(self, value):
         if value <= 0:
@@ -126,6 +179,53 @@ class CartItemSerializer(serializers.Serializer):
         return value
 
 
+#  Bulk moderation of pending listings
+class PropertyModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+#  Bulk add/remove of the user's favorites
+class FavoriteSyncSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=1000
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=1000
+    )
+
+
+#  Admin notification: one user, or a segment such as a property's favoriters
+class NotificationSendSerializer(serializers.Serializer):
+    message = serializers.CharField()
+    user_id = serializers.IntegerField(required=False)
+    segment = serializers.ChoiceField(choices=list(notifications.SEGMENTS), required=False)
+    property_id = serializers.IntegerField(required=False)
+
+    def validate_user_id(self, value):
+        if not User.objects.filter(pk=value).exists():
+            raise serializers.ValidationError("User not found.")
+        return value
+
+    def validate(self, attrs):
+        if ('user_id' in attrs) == ('segment' in attrs):
+            raise serializers.ValidationError("Provide either user_id or segment.")
+        if attrs.get('segment') in ('favorited', 'purchased') and 'property_id' not in attrs:
+            raise serializers.ValidationError({'property_id': "This segment requires property_id."})
+        return attrs
+
+
 #  Purchase Serializer
 class PurchaseSerializer(serializers.ModelSerializer):
     class Meta:
@@ -136,13 +236,18 @@ class PurchaseSerializer(serializers.ModelSerializer):
         return Purchase.objects.create(**validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentListSerializer(metrics.TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class CommentSerializer(metrics.TimedSerializerMixin, serializers.ModelSerializer):
     user_name = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = ['id', 'user', 'property', 'content', 'created_at', 'user_name']
         read_only_fields = ['user', 'created_at']
+        list_serializer_class = CommentListSerializer
 
     def get_user_name(self, obj):
         return obj.user.first_name or obj.user.username
@@ -1,14 +1,142 @@
 # properties/signals.py
-from django.db.models.signals import post_save
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
 from django.dispatch import receiver
-from .models import Profile
+from .models import Profile, Property, Category, Comment, Purchase
+from . import counters
+from . import search
+from . import cache as response_cache
+from . import images
+from . import notifications
+from . import metrics
+from .moderation import properties_moderated
+from .authentication import token_cache
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+
+# Count and time the queries of each request (metrics.py)
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    metrics.install(connection)
+
+
+# Keep the full-text search index in sync (in a background job)
+@receiver([post_save, post_delete], sender=Property)
+def index_property(sender, instance, **kwargs):
+    search.schedule_sync([instance.pk])
+
+@receiver(post_save, sender=Category)
+def reindex_category_properties(sender, instance, created, **kwargs):
+    if not created:
+        search.schedule_category_sync(instance.pk)
+
+
+# Invalidate cached catalogue responses once the write has committed
+@receiver([post_save, post_delete], sender=Property)
+def invalidate_property_responses(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit(
+        response_cache.PROPERTIES,
+        response_cache.FEATURED,
+        response_cache.comments_namespace(instance.pk)
+    )
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_responses(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit(
+        response_cache.CATEGORIES,
+        response_cache.PROPERTIES,
+        response_cache.FEATURED
+    )
+
+@receiver(properties_moderated, sender=Property)
+def invalidate_moderated_responses(sender, property_ids, **kwargs):
+    # Status is not part of the search document, so only the cache is stale
+    response_cache.invalidate_on_commit(
+        response_cache.PROPERTIES,
+        response_cache.FEATURED,
+        # Comments of a listing that is no longer public must not be served
+        *[response_cache.comments_namespace(pk) for pk in property_ids]
+    )
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    response_cache.invalidate_on_commit(response_cache.comments_namespace(instance.property_id))
+
+@receiver(m2m_changed, sender=Property.favorites.through)
+def invalidate_favorite_responses(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        response_cache.invalidate_on_commit(response_cache.PROPERTIES, response_cache.FEATURED)
+
+
+# Generate thumbnails for newly uploaded images
+@receiver(post_save, sender=Property)
+def generate_property_image_variants(sender, instance, **kwargs):
+    images.schedule_variants(instance.image_path, instance.variants_source)
+
+@receiver(post_save, sender=Profile)
+def generate_profile_image_variants(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'image' in update_fields:
+        images.schedule_variants(instance.image, instance.variants_source)
+
+
+# Tell everyone who favorited a listing when its price drops
+@receiver(post_save, sender=Property)
+def notify_price_drop(sender, instance, created, **kwargs):
+    old_price = getattr(instance, '_loaded_price', None)
+    instance._loaded_price = instance.price
+    if created or old_price is None or instance.status != 'approved':
+        return
+    if instance.price < old_price:
+        notifications.notify_price_drop(instance, old_price)
+
+
+# Drop cached token lookups when a token or its user changes
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    token_cache.invalidate_key(instance.key)
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user_tokens(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.pk)
+
+
+# Denormalized popularity counters on Property
+@receiver(m2m_changed, sender=Property.favorites.through)
+def update_favorites_count(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``reverse`` means the change was made from the user side
+    # (user.favorite_properties), so pk_set holds property ids.
+    if action == 'pre_clear' and reverse:
+        instance._cleared_favorite_ids = list(
+            instance.favorite_properties.values_list('pk', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        counters.recount_favorites(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        if reverse:
+            counters.recount_favorites(getattr(instance, '_cleared_favorite_ids', []))
+        else:
+            counters.recount_favorites([instance.pk])
+
+@receiver(post_save, sender=Comment)
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust('comments_count', {instance.property_id: 1})
+
+@receiver(post_delete, sender=Comment)
+def decrement_comments_count(sender, instance, **kwargs):
+    counters.adjust('comments_count', {instance.property_id: -1})
+
+@receiver(post_save, sender=Purchase)
+def increment_purchases_count(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust('purchases_count', {instance.property_id: instance.quantity})
+
+@receiver(post_delete, sender=Purchase)
+def decrement_purchases_count(sender, instance, **kwargs):
+    counters.adjust('purchases_count', {instance.property_id: -instance.quantity})
@@ -0,0 +1,52 @@
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_QUERY_PARAM = 'stream'
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# Streams a queryset as a JSON array or NDJSON, reading it with
+# ``.iterator(chunk_size=...)`` and serializing one chunk at a time, so
+# memory stays bounded by the chunk size instead of the table size.
+
+def requested_format(request):
+    stream = request.query_params.get(STREAM_QUERY_PARAM)
+    return stream if stream in CONTENT_TYPES else None
+
+
+def serialize_in_chunks(queryset, serializer_class, context=None, chunk_size=500):
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) >= chunk_size:
+            yield from _serialize(chunk, serializer_class, context)
+            chunk = []
+    if chunk:
+        yield from _serialize(chunk, serializer_class, context)
+
+
+def streaming_response(queryset, serializer_class, fmt, context=None, chunk_size=500):
+    rows = serialize_in_chunks(queryset, serializer_class, context, chunk_size)
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    if fmt == 'ndjson':
+        body = (encoder.encode(row) + '\n' for row in rows)
+    else:
+        body = _json_array(encoder, rows)
+
+    return StreamingHttpResponse(body, content_type=CONTENT_TYPES[fmt])
+
+
+def _serialize(chunk, serializer_class, context):
+    # A fresh context per chunk: list serializers cache per-page data in it
+    return serializer_class(chunk, many=True, context=dict(context or {})).data
+
+
+def _json_array(encoder, rows):
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',' if index else '') + encoder.encode(row)
+    yield ']'
@@ -1,3 +1,1325 @@
-from django.test import TestCase
+import base64
+import json
+import random
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User, update_last_login
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import benchmark, counters, images, jobs, metrics, moderation, notifications, streaming
+from .authentication import token_cache
+from .models import Category, Comment, Job, Notification, Profile, Property, Purchase
+from .routers import ReplicaRouter, use_primary
+from .serializers import PropertySerializer
+
+
+# Replica routing has its own tests; API tests always read from default.
+# Background jobs run right after commit (captureOnCommitCallbacks).
+@override_settings(REPLICA_DATABASES=[], JOBS={'ALWAYS_EAGER': True})
+class PropertyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='buyer@example.com',
+            first_name='Buyer',
+            password='secret-pass-123'
+        )
+        self.category = Category.objects.create(name='Apartments')
+
+    def create_properties(self, count, **kwargs):
+        fields = {
+            'type': 'Apartment',
+            'location': 'Amman',
+            'price': 1000,
+            'status': 'approved',
+            'category': self.category,
+        }
+        fields.update(kwargs)
+        return [
+            Property.objects.create(name=f'Property {index}', **fields)
+            for index in range(count)
+        ]
+
+
+class FavoriteBatchingTests(PropertyTestCase):
+    def test_is_favorite_resolved_for_whole_page(self):
+        properties = self.create_properties(5)
+        properties[1].favorites.add(self.user)
+        properties[3].favorites.add(self.user)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get('/api/properties/')
+
+        favorites = {item['id'] for item in response.json() if item['is_favorite']}
+        self.assertEqual(favorites, {properties[1].id, properties[3].id})
+
+    def test_anonymous_user_has_no_favorites(self):
+        self.create_properties(2)
+
+        response = self.client.get('/api/properties/')
+
+        self.assertFalse(any(item['is_favorite'] for item in response.json()))
+
+
+class ListingQueryCountTests(PropertyTestCase):
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_result_size(self):
+        self.client.force_authenticate(self.user)
+        urls = [
+            '/api/properties/',
+            '/api/properties/featured/',
+            f'/api/properties/by_category/?category_id={self.category.id}',
+            '/api/properties/search/?q=Property',
+            '/api/user/purchases/',
+        ]
+
+        first = self.create_properties(1, is_featured=True, added_by=self.user)
+        first[0].favorites.add(self.user)
+        Purchase.objects.create(user=self.user, property=first[0])
+        small = {url: self.count_queries(url) for url in urls}
+
+        for prop in self.create_properties(10, is_featured=True, added_by=self.user):
+            prop.favorites.add(self.user)
+            Purchase.objects.create(user=self.user, property=prop)
+        large = {url: self.count_queries(url) for url in urls}
+
+        self.assertEqual(small, large)
+
+
+class KeysetPaginationTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.properties = [
+            self.create_properties(1, price=price)[0] for price in (300, 100, 300, 200, 300)
+        ]
+
+    def cursor(self, payload):
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def test_walks_forward_and_back_on_non_unique_key(self):
+        expected = [prop.id for prop in sorted(self.properties, key=lambda prop: (prop.price, prop.id))]
+
+        pages, url = [], '/api/properties/?ordering=price&page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            pages.append([item['id'] for item in page['results']])
+            url = page['next']
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 1])
+
+        # Back from the last page through the ``previous`` links
+        first = self.client.get('/api/properties/?ordering=price&page_size=2').json()
+        self.assertIsNone(first['previous'])
+        last = self.client.get(self.client.get(first['next']).json()['next']).json()
+        back, url = [], last['previous']
+        while url:
+            page = self.client.get(url).json()
+            back.insert(0, [item['id'] for item in page['results']])
+            url = page['previous']
+        self.assertEqual(back, pages[:-1])
+
+    def test_descending_id_walk(self):
+        seen, url = [], '/api/properties/?ordering=-id&page_size=3'
+        while url:
+            page = self.client.get(url).json()
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+        self.assertEqual(seen, sorted((prop.id for prop in self.properties), reverse=True))
+
+    @override_settings(CURSOR_PAGINATION={'PAGE_SIZE': 2, 'MAX_PAGE_SIZE': 3})
+    def test_page_size_capped(self):
+        page = self.client.get('/api/properties/?page_size=50').json()
+        self.assertEqual(page['page_size'], 3)
+        self.assertEqual(len(page['results']), 3)
+
+        page = self.client.get('/api/properties/?cursor=&page_size=abc').json()
+        self.assertEqual(page['page_size'], 2)
+
+    def test_tampered_cursor_is_404(self):
+        cursors = [
+            'not-a-cursor!',
+            self.cursor({'o': 'price', 'k': ['abc', 1], 'r': False}),
+            self.cursor({'o': 'id', 'k': [[1]], 'r': False}),
+            self.cursor({'o': 'id', 'k': [None], 'r': False}),
+            self.cursor({'o': 'id', 'k': 5, 'r': False}),
+            self.cursor({'o': 'newest', 'k': ['yesterday', 1], 'r': False}),
+            self.cursor({'o': 'unknown', 'k': [1], 'r': False}),
+        ]
+        for cursor in cursors:
+            response = self.client.get('/api/properties/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+        valid = self.cursor({'o': 'price', 'k': ['150.00', '0'], 'r': False})
+        response = self.client.get('/api/properties/', {'cursor': valid})
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+class CheckoutTests(PropertyTestCase):
+    def checkout(self, items):
+        self.client.force_authenticate(self.user)
+        return self.client.post('/api/cart/checkout/', {'items': items}, format='json')
+
+    def test_checkout_stores_quantity_per_item(self):
+        properties = self.create_properties(3)
+        items = [{'property_id': prop.id, 'quantity': 5} for prop in properties]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.checkout(items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 3)
+        self.assertEqual(
+            list(Purchase.objects.values_list('quantity', flat=True)),
+            [5, 5, 5]
+        )
+        # in_bulk + transaction + one INSERT + one counter UPDATE, for any cart size
+        self.assertLessEqual(len(queries), 5)
+
+    def test_unknown_property_rejects_whole_cart(self):
+        prop = self.create_properties(1)[0]
+
+        response = self.checkout([
+            {'property_id': prop.id, 'quantity': 1},
+            {'property_id': prop.id + 100, 'quantity': 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_quantity_defaults_to_one(self):
+        prop = self.create_properties(1)[0]
+
+        response = self.checkout([{'property_id': prop.id}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['quantity'], 1)
+        prop.refresh_from_db()
+        self.assertEqual(prop.purchases_count, 1)
+
+
+class SearchTests(PropertyTestCase):
+    def search(self, query, **params):
+        params['q'] = query
+        return self.client.get('/api/properties/search/', params)
+
+    def test_prefix_match_across_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            villa = Property.objects.create(
+                name='Sunny villa', type='Villa', location='Irbid',
+                price=500, status='approved', category=self.category
+            )
+            flat = Property.objects.create(
+                name='Downtown flat', type='Apartment', location='Amman',
+                price=300, status='approved', category=self.category
+            )
+
+        self.assertEqual([item['id'] for item in self.search('irb').json()], [villa.id])
+        self.assertEqual([item['id'] for item in self.search('apart amm').json()], [flat.id])
+        self.assertEqual(len(self.search('apartments').json()), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prop = self.create_properties(1)[0]
+            prop.name = 'Renamed penthouse'
+            prop.save()
+        self.assertEqual(len(self.search('penthouse').json()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Chalets'
+            self.category.save()
+        self.assertEqual(len(self.search('chalet').json()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.delete()
+        self.assertEqual(self.search('penthouse').json(), [])
+
+    @override_settings(JOBS={'ALWAYS_EAGER': False})
+    def test_index_updated_by_worker(self):
+        prop = self.create_properties(1)[0]
+        prop.name = 'Lake house'
+        prop.save()
+
+        self.assertEqual(self.search('lake').json(), [])
+        self.assertEqual(Job.objects.filter(name='search.sync').count(), 1)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(len(self.search('lake').json()), 1)
+
+    def test_paginated_results_ranked_by_relevance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            weak, other, strong, middle = self.create_properties(4)
+            names = ['Flat near the lake in a quiet green suburb', 'Downtown flat', 'Lake lake house', 'Lake cabin']
+            for prop, name in zip((weak, other, strong, middle), names):
+                prop.name = name
+                prop.save()
+
+        ranked = [item['id'] for item in self.search('lake').json()]
+        self.assertEqual(ranked, [strong.id, middle.id, weak.id])
+        self.assertNotIn(other.id, ranked)
+
+        seen, page = [], self.search('lake', page_size=1).json()
+        while True:
+            seen += [item['id'] for item in page['results']]
+            if not page['next']:
+                break
+            page = self.client.get(page['next']).json()
+        self.assertEqual(seen, ranked)
+
+        previous = self.client.get(page['previous']).json()
+        self.assertEqual([item['id'] for item in previous['results']], [middle.id])
+
+    def test_client_ordering_replaces_rank(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cheap, pricey, middle = (
+                self.create_properties(1, price=price)[0] for price in (100, 900, 500)
+            )
+        by_price = [pricey.id, middle.id, cheap.id]
+
+        self.assertEqual([item['id'] for item in self.search('property', ordering='-price').json()], by_price)
+        page = self.search('property', ordering='-price', page_size=2).json()
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([item['id'] for item in page['results'] + rest['results']], by_price)
+
+    def test_filters_and_visibility(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_properties(2, transaction_type='rent')
+            self.create_properties(1, transaction_type='sale')
+            self.create_properties(1, status='pending')
+
+        self.assertEqual(len(self.search('property').json()), 3)
+        self.assertEqual(len(self.search('property', transaction_type='rent').json()), 2)
+
+
+class FilterTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.houses = Category.objects.create(name='Houses')
+        self.create_properties(2, price=100, transaction_type='rent')
+        self.create_properties(3, price=900, transaction_type='sale', category=self.houses)
+        self.create_properties(1, price=500, is_featured=True)
+
+    def ids(self, **params):
+        return {item['id'] for item in self.client.get('/api/properties/', params).json()}
+
+    def test_range_and_equality_filters(self):
+        self.assertEqual(len(self.ids(min_price=200, max_price=950)), 4)
+        self.assertEqual(len(self.ids(transaction_type='rent')), 2)
+        self.assertEqual(len(self.ids(category_id=self.houses.id)), 3)
+        self.assertEqual(len(self.ids(is_featured='true')), 1)
+
+    def test_invalid_filter_value(self):
+        response = self.client.get('/api/properties/', {'min_price': 'cheap'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_facets_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.client.get('/api/properties/facets/').json()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(facets['total'], 6)
+        self.assertEqual(facets['transaction_type'], {'rent': 2, 'sale': 4})
+        self.assertEqual(facets['is_featured'], {'true': 1, 'false': 5})
+        self.assertEqual(facets['price'], {'min': '100.00', 'max': '900.00'})
+        self.assertEqual(facets['category'][0], {'id': self.category.id, 'name': 'Apartments', 'count': 3})
+
+
+class ResponseCacheTests(PropertyTestCase):
+    def test_anonymous_list_is_cached_until_a_property_changes(self):
+        prop = self.create_properties(1)[0]
+
+        first = self.client.get('/api/properties/')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get('/api/properties/')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(first.content, second.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.name = 'Changed'
+            prop.save()
+
+        third = self.client.get('/api/properties/')
+        self.assertEqual(third['X-Cache'], 'MISS')
+        self.assertEqual(third.json()[0]['name'], 'Changed')
+
+    def test_authenticated_list_is_not_cached(self):
+        self.create_properties(1)
+        self.client.force_authenticate(self.user)
+
+        self.client.get('/api/properties/')
+        response = self.client.get('/api/properties/')
+
+        self.assertNotIn('X-Cache', response)
+
+    def test_category_list_keyed_by_query_params(self):
+        self.client.get('/api/categories/')
+        self.assertEqual(self.client.get('/api/categories/')['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/categories/?x=1')['X-Cache'], 'MISS')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Land')
+
+        response = self.client.get('/api/categories/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()), 2)
+
+
+class ImageVariantTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+    def upload(self):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 900), 'navy').save(buffer, format='JPEG')
+        return SimpleUploadedFile('house.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_variants_generated_and_exposed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prop = self.create_properties(1, image_path=self.upload())[0]
+        field_file = prop.image_path
+
+        with field_file.storage.open(images.variant_name(field_file.name, 'thumb')) as thumb:
+            self.assertLessEqual(max(Image.open(thumb).size), 160)
+        prop.refresh_from_db()
+        self.assertEqual(prop.variants_source, field_file.name)
+        self.assertEqual(images.generate_variants(field_file.storage, field_file.name), [])
+
+        # Serializing trusts variants_source instead of checking the storage
+        with mock.patch('django.core.files.storage.FileSystemStorage.exists', side_effect=AssertionError):
+            item = self.client.get(f'/api/properties/{prop.id}/').json()
+        self.assertTrue(item['image_variants']['thumb'].endswith(
+            images.variant_name(field_file.name, 'thumb').split('/')[-1]
+        ))
+
+    def test_replaced_image_falls_back_until_regenerated(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            prop = self.create_properties(1, image_path=self.upload())[0]
+        prop.refresh_from_db()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            prop.image_path = self.upload()
+            prop.save()
+        item = self.client.get(f'/api/properties/{prop.id}/').json()
+        self.assertEqual(item['image_variants']['thumb'], item['image_path'])
+
+        for callback in callbacks:
+            callback()
+        item = self.client.get(f'/api/properties/{prop.id}/').json()
+        self.assertNotEqual(item['image_variants']['thumb'], item['image_path'])
+
+    def test_missing_variant_falls_back_to_original(self):
+        prop = self.create_properties(1, image_path=self.upload())[0]
+
+        item = self.client.get(f'/api/properties/{prop.id}/').json()
+
+        self.assertEqual(item['image_variants']['card'], item['image_path'])
+
+
+class CachedTokenAuthenticationTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached_between_requests(self):
+        self.client.get('/api/user/purchases/')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/user/purchases/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in queries))
+
+    def test_deactivated_user_rejected_immediately(self):
+        self.client.get('/api/user/purchases/')
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get('/api/user/purchases/').status_code, 401)
+
+    def test_deleted_token_rejected_immediately(self):
+        self.client.get('/api/user/purchases/')
+
+        self.token.delete()
+
+        self.assertEqual(self.client.get('/api/user/purchases/').status_code, 401)
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_catalogue_reads_go_to_replica(self):
+        self.assertEqual(self.router.db_for_read(Property), 'replica1')
+        self.assertEqual(self.router.db_for_read(Comment), 'replica1')
+        self.assertIsNone(self.router.db_for_read(Purchase))
+        self.assertEqual(self.router.db_for_write(Property), 'default')
+
+    def test_use_primary_pins_reads(self):
+        with use_primary():
+            self.assertIsNone(self.router.db_for_read(Property))
+        self.assertEqual(self.router.db_for_read(Property), 'replica1')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas_configured(self):
+        self.assertIsNone(self.router.db_for_read(Property))
+
+
+class PurchaseHistoryTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+        self.properties = self.create_properties(3)
+        for prop in self.properties:
+            Purchase.objects.create(user=self.user, property=prop, quantity=2)
+        Purchase.objects.create(user=self.user, property=self.properties[0], quantity=3)
+
+    def test_paginated_history_walks_all_rows(self):
+        seen = []
+        url = '/api/user/purchases/?page_size=2'
+        while url:
+            page = self.client.get(url).json()
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+
+        self.assertEqual(seen, sorted(Purchase.objects.values_list('id', flat=True), reverse=True))
+
+    def test_grouped_by_property(self):
+        rows = self.client.get('/api/user/purchases/?group_by=property').json()
+
+        quantities = {row['property']['id']: row['quantity'] for row in rows}
+        self.assertEqual(quantities[self.properties[0].id], 5)
+        self.assertEqual(quantities[self.properties[1].id], 2)
+        self.assertEqual(rows[0]['purchase_count'], 2)
+
+    def test_query_count_independent_of_history_size(self):
+        def count(url):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            return len(queries)
+
+        urls = ['/api/user/purchases/', '/api/user/purchases/?group_by=property']
+        before = [count(url) for url in urls]
+        for prop in self.create_properties(5):
+            Purchase.objects.create(user=self.user, property=prop)
+        self.assertEqual(before, [count(url) for url in urls])
+
+
+class CounterTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = self.create_properties(1)[0]
+        self.client.force_authenticate(self.user)
+
+    def counts(self):
+        self.prop.refresh_from_db()
+        return (self.prop.favorites_count, self.prop.comments_count, self.prop.purchases_count)
+
+    def test_counters_follow_api_writes(self):
+        url = f'/api/properties/{self.prop.id}'
+        self.client.post(f'{url}/favorite/')
+        self.client.post(f'{url}/favorite/')
+        self.client.post(f'{url}/comments/', {'content': 'Nice'}, format='json')
+        self.client.post(f'{url}/buy/')
+        self.client.post(
+            '/api/cart/checkout/',
+            {'items': [{'property_id': self.prop.id, 'quantity': 4}]},
+            format='json'
+        )
+        self.assertEqual(self.counts(), (1, 1, 5))
+
+        self.client.post(f'{url}/unfavorite/')
+        self.user.favorite_properties.add(self.prop)
+        self.user.favorite_properties.clear()
+        Comment.objects.all().delete()
+        self.assertEqual(self.counts(), (0, 0, 5))
+
+    def test_reconcile_repairs_drift(self):
+        self.prop.favorites.add(self.user)
+        Property.objects.filter(pk=self.prop.pk).update(favorites_count=7, purchases_count=3)
+
+        self.assertEqual(counters.reconcile(), 1)
+        self.assertEqual(self.counts(), (1, 0, 0))
+        self.assertEqual(counters.reconcile(), 0)
+
+    def test_counter_changes_invalidate_cached_listings(self):
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get('/api/properties/')['X-Cache'], 'MISS')
+        self.assertEqual(anonymous.get('/api/properties/')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/properties/{self.prop.id}/comments/', {'content': 'Nice'}, format='json')
+            self.client.post(
+                '/api/cart/checkout/',
+                {'items': [{'property_id': self.prop.id, 'quantity': 4}]},
+                format='json'
+            )
+
+        response = anonymous.get('/api/properties/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        item = response.json()[0]
+        self.assertEqual((item['comments_count'], item['purchases_count']), (1, 4))
+
+
+class OrderingTests(PropertyTestCase):
+    def ids(self, url):
+        return [item['id'] for item in self.client.get(url).json()]
+
+    def test_price_and_newest_ordering(self):
+        cheap, pricey, middle = (
+            self.create_properties(1, price=price)[0] for price in (100, 900, 500)
+        )
+
+        self.assertEqual(self.ids('/api/properties/?ordering=-price'), [pricey.id, middle.id, cheap.id])
+        self.assertEqual(self.ids('/api/properties/?ordering=newest'), [middle.id, pricey.id, cheap.id])
+
+    def test_popular_feed_uses_refreshed_score(self):
+        quiet, loved = self.create_properties(2)
+        loved.favorites.add(self.user)
+        Purchase.objects.create(user=self.user, property=loved)
+
+        self.assertEqual(counters.refresh_popularity(), 1)
+        self.assertEqual(self.ids('/api/properties/popular/'), [loved.id, quiet.id])
+
+        page = self.client.get('/api/properties/popular/?page_size=1').json()
+        self.assertEqual([item['id'] for item in page['results']], [loved.id])
+        self.assertEqual([item['id'] for item in self.client.get(page['next']).json()['results']], [quiet.id])
+
+
+class StreamingTests(PropertyTestCase):
+    def test_property_list_streams_json_and_ndjson(self):
+        properties = self.create_properties(7)
+        properties[2].favorites.add(self.user)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get('/api/properties/', {'stream': 'json'})
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(rows, self.client.get('/api/properties/').json())
+
+        response = self.client.get('/api/properties/', {'stream': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['id'] for line in lines], [prop.id for prop in properties])
+
+    def test_favorites_resolved_per_chunk(self):
+        properties = self.create_properties(5)
+        properties[4].favorites.add(self.user)
+
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+        rows = list(streaming.serialize_in_chunks(
+            Property.objects.for_listing().order_by('id'),
+            PropertySerializer,
+            context={'request': request},
+            chunk_size=2
+        ))
+
+        self.assertEqual([row['is_favorite'] for row in rows], [False] * 4 + [True])
+
+    def test_admin_comment_export(self):
+        prop = self.create_properties(1)[0]
+        Comment.objects.create(user=self.user, property=prop, content='Great')
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get('/api/admin/comments/', {'stream': 'ndjson'})
+
+        self.assertEqual(json.loads(b''.join(response.streaming_content))['user_name'], 'Buyer')
+
+
+class BulkImportExportTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(
+            '/api/properties/import/',
+            {'file': SimpleUploadedFile(name, content.encode())},
+            format='multipart'
+        )
+
+    def test_csv_import_reports_bad_rows(self):
+        content = (
+            'name,type,location,price,transaction_type,category\n'
+            'Loft,Apartment,Cairo,1000,sale,Apartments\n'
+            f'Studio,Apartment,Giza,500,rent,{self.category.id}\n'
+            'Broken,Apartment,Giza,abc,rent,Apartments\n'
+            'Villa,House,Alex,9000,sale,Castles\n'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('listings.csv', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [4, 5])
+        self.assertIn('category', response.data['errors'][1]['errors'])
+        self.assertEqual(
+            set(Property.objects.values_list('name', 'status')),
+            {('Loft', 'approved'), ('Studio', 'approved')}
+        )
+
+    def test_imported_rows_are_searchable(self):
+        content = json.dumps({
+            'name': 'Harbour view', 'type': 'Apartment', 'location': 'Alexandria',
+            'price': '2500', 'transaction_type': 'sale', 'category': 'apartments',
+        }) + '\nnot json\n'
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('listings.ndjson', content)
+
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual([item['name'] for item in self.client.get('/api/properties/search/?q=harb').json()], ['Harbour view'])
+
+    def test_export_round_trip(self):
+        self.create_properties(3)
+
+        response = self.client.get('/api/properties/export/', {'file_format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode()
+        Property.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('listings.ndjson', lines)
+
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(Property.objects.filter(category=self.category).count(), 3)
+
+    def test_agent_import_lands_as_pending(self):
+        self.user.is_staff = False
+        self.user.save()
+        content = (
+            'name,type,location,price,transaction_type,category,status,is_featured\n'
+            'Loft,Apartment,Cairo,1000,sale,Apartments,approved,true\n'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload('listings.csv', content)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(Property.objects.values_list('status', 'is_featured', 'added_by')),
+            [('pending', False, self.user.id)]
+        )
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.upload('listings.csv', content).status_code, 401)
+
+
+class ModerationTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_approve_in_one_update(self):
+        pending = self.create_properties(3, status='pending')
+        approved = self.create_properties(1, status='approved')[0]
+        ids = [prop.id for prop in pending] + [approved.id, 999]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/properties/moderate/',
+                {'ids': ids, 'action': 'approve'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['updated'], response.data['unchanged'], response.data['not_found']),
+            (3, 1, [999])
+        )
+        updates = [query for query in queries if query['sql'].startswith('UPDATE "properties_property"')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(Property.objects.filter(status='approved').count(), 4)
+
+    def test_reject_records_reason_and_invalidates_cache(self):
+        prop = self.create_properties(1, status='approved')[0]
+        self.client.force_authenticate(None)
+        self.assertEqual(len(self.client.get('/api/properties/').json()), 1)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/api/properties/moderate/',
+                {'ids': [prop.id], 'action': 'reject', 'reason': 'Duplicate listing'},
+                format='json'
+            )
+
+        prop.refresh_from_db()
+        self.assertEqual((prop.status, prop.moderation_reason), ('rejected', 'Duplicate listing'))
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/properties/').json(), [])
+
+    def test_moderated_signal_sent_once_per_batch(self):
+        properties = self.create_properties(2, status='pending')
+        received = []
+
+        def receiver(sender, property_ids, **kwargs):
+            received.append(sorted(property_ids))
+
+        moderation.properties_moderated.connect(receiver)
+        self.addCleanup(moderation.properties_moderated.disconnect, receiver)
+        moderation.moderate([prop.id for prop in properties], 'approved', moderator=self.user)
+        moderation.moderate([prop.id for prop in properties], 'approved', moderator=self.user)
+
+        self.assertEqual(received, [[prop.id for prop in properties]])
+
+    def test_invalid_payload(self):
+        response = self.client.post('/api/properties/moderate/', {'ids': [], 'action': 'delete'}, format='json')
+        self.assertEqual(set(response.data), {'ids', 'action'})
+
+
+class FavoritesTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_sync_applies_diff_in_bulk(self):
+        kept, dropped, new, hidden = self.create_properties(4)
+        hidden.status = 'pending'
+        hidden.save()
+        kept.favorites.add(self.user)
+        dropped.favorites.add(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/user/favorites/sync/',
+                {'add': [kept.id, new.id, hidden.id, 999], 'remove': [dropped.id]},
+                format='json'
+            )
+
+        self.assertEqual(response.data, {'added': 1, 'removed': 1, 'not_found': [hidden.id, 999]})
+        self.assertEqual(
+            set(self.user.favorite_properties.values_list('id', flat=True)),
+            {kept.id, new.id}
+        )
+        self.assertEqual(
+            dict(Property.objects.values_list('id', 'favorites_count')),
+            {kept.id: 1, dropped.id: 0, new.id: 1, hidden.id: 0}
+        )
+
+    def test_favorites_listing_is_paginated(self):
+        properties = self.create_properties(5)
+        self.user.favorite_properties.add(*properties[1:4])
+
+        with self.assertNumQueries(3):
+            page = self.client.get('/api/user/favorites/', {'page_size': 2}).json()
+
+        self.assertEqual([item['id'] for item in page['results']], [properties[1].id, properties[2].id])
+        self.assertTrue(all(item['is_favorite'] for item in page['results']))
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([item['id'] for item in rest['results']], [properties[3].id])
+        self.assertIsNone(rest['next'])
+
+
+class CommentTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = self.create_properties(1)[0]
+        self.other = User.objects.create_user('other', 'other@example.com', 'pass', first_name='Other')
+
+    def url(self):
+        return f'/api/properties/{self.prop.id}/comments/'
+
+    def test_comments_paginated_with_joined_users(self):
+        for index, user in enumerate([self.user, self.other] * 3):
+            Comment.objects.create(user=user, property=self.prop, content=f'comment {index}')
+
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get(self.url(), {'page_size': 4}).json()
+
+        comment_queries = [query for query in queries if 'properties_comment' in query['sql']]
+        self.assertEqual(len(comment_queries), 1)
+        self.assertNotIn('FROM "auth_user"', ' '.join(query['sql'] for query in queries))
+        self.assertEqual(
+            [item['content'] for item in page['results']],
+            ['comment 5', 'comment 4', 'comment 3', 'comment 2']
+        )
+        self.assertEqual(page['results'][0]['user_name'], 'Other')
+
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([item['content'] for item in rest['results']], ['comment 1', 'comment 0'])
+
+    def test_first_page_cached_until_comment_written(self):
+        Comment.objects.create(user=self.user, property=self.prop, content='First')
+        self.assertEqual(self.client.get(self.url(), {'page_size': 10})['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url(), {'page_size': 10})['X-Cache'], 'HIT')
+
+        self.client.force_authenticate(self.other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url(), {'content': 'Second'}, format='json')
+        self.client.force_authenticate(None)
+
+        response = self.client.get(self.url(), {'page_size': 10})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([item['content'] for item in response.json()['results']], ['Second', 'First'])
+
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/admin/comments/{response.json()['results'][0]['id']}/delete/")
+        self.client.force_authenticate(None)
+
+        response = self.client.get(self.url(), {'page_size': 10})
+        self.assertEqual([item['content'] for item in response.json()['results']], ['First'])
+
+
+class AsyncViewTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.properties = self.create_properties(3)
+        self.properties[1].favorites.add(self.user)
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {'Authorization': f'Token {self.token.key}'}
+
+    async def test_property_list_matches_sync_view(self):
+        response = await self.async_client.get(
+            '/api/async/properties/', {'page_size': 2}, headers=self.headers
+        )
+        sync_response = await sync_to_async(self.client.get)(
+            '/api/properties/', {'page_size': 2}, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], sync_response.json()['results'])
+        self.assertEqual([item['is_favorite'] for item in response.json()['results']], [False, True])
+
+        rest = await self.async_client.get(response.json()['next'], headers=self.headers)
+        self.assertEqual([item['id'] for item in rest.json()['results']], [self.properties[2].id])
+
+    async def test_detail_and_comments(self):
+        prop = self.properties[0]
+        await Comment.objects.acreate(user=self.user, property=prop, content='Nice')
+
+        detail = await self.async_client.get(f'/api/async/properties/{prop.id}/')
+        comments = await self.async_client.get(f'/api/async/properties/{prop.id}/comments/')
+        missing = await self.async_client.get('/api/async/properties/999/')
+
+        self.assertEqual(detail.json()['name'], prop.name)
+        self.assertEqual([comment['user_name'] for comment in comments.json()], ['Buyer'])
+        self.assertEqual(missing.status_code, 404)
+
+    async def test_categories_cached_and_invalid_token_rejected(self):
+        first = await self.async_client.get('/api/async/categories/')
+        second = await self.async_client.get('/api/async/categories/')
+        rejected = await self.async_client.get(
+            '/api/async/properties/', headers={'Authorization': 'Token nope'}
+        )
+
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.json(), [{'id': self.category.id, 'name': 'Apartments', 'icon': None}])
+        self.assertEqual(rejected.status_code, 401)
+
+    async def test_bad_filter_and_cursor_match_sync_errors(self):
+        prop = self.properties[0]
+        requests = [
+            ('/api/properties/', {'min_price': 'abc'}),
+            ('/api/properties/', {'cursor': 'zzz'}),
+            (f'/api/properties/{prop.id}/comments/', {'cursor': 'zzz'}),
+        ]
+        for path, params in requests:
+            response = await self.async_client.get('/api/async' + path[4:], params)
+            sync_response = await sync_to_async(self.client.get)(path, params)
+
+            self.assertEqual(response.status_code, sync_response.status_code)
+            self.assertIn(response.status_code, (400, 404))
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertEqual(response.json(), sync_response.json())
+
+
+class FailingTransport:
+    def send_batch(self, notifications):
+        raise ConnectionError('push gateway unavailable')
+
+
+@override_settings(NOTIFICATIONS={
+    'TRANSPORT': 'properties.notifications.LocmemTransport',
+    'BATCH_SIZE': 2,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 0,
+})
+class NotificationTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        notifications.LocmemTransport.outbox.clear()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(JOBS={'ALWAYS_EAGER': False})
+    def test_segment_fan_out_runs_in_background(self):
+        prop = self.create_properties(1)[0]
+        fans = [User.objects.create_user(f'fan{index}', f'fan{index}@example.com', 'pass') for index in range(3)]
+        prop.favorites.add(*fans)
+        Job.objects.all().delete()  # search indexing of the new listing
+
+        response = self.client.post(
+            '/api/notifications/',
+            {'segment': 'favorited', 'property_id': prop.id, 'message': 'Open house on Friday'},
+            format='json'
+        )
+
+        # The request only enqueues the fan-out
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(list(Job.objects.values_list('name', flat=True)), ['notifications.fan_out'])
+        status_url = f"/api/notifications/{response.data['job_id']}/"
+        self.assertTrue(self.client.get(status_url).data['fan_out_pending'])
+
+        # Fan-out, then its two delivery batches (BATCH_SIZE 2)
+        self.assertEqual(jobs.run_pending(), 3)
+        self.assertEqual(
+            sorted(notification.user_id for notification in notifications.LocmemTransport.outbox),
+            sorted(fan.id for fan in fans)
+        )
+        status_response = self.client.get(status_url)
+        self.assertEqual(
+            (status_response.data['recipients'], status_response.data['sent'],
+             status_response.data['fan_out_pending']),
+            (3, 3, False)
+        )
+
+    @override_settings(JOBS={'ALWAYS_EAGER': False})
+    def test_failed_fan_out_reported(self):
+        response = self.client.post(
+            '/api/notifications/', {'user_id': self.user.id, 'message': 'Hello'}, format='json'
+        )
+        status_url = f"/api/notifications/{response.data['job_id']}/"
+        Job.objects.filter(name='notifications.fan_out').update(max_attempts=1)
+
+        with mock.patch.object(notifications, 'notify', side_effect=RuntimeError('database is locked')):
+            jobs.run_pending()
+
+        status_response = self.client.get(status_url)
+        self.assertEqual(status_response.status_code, 200)
+        self.assertEqual(
+            (status_response.data['recipients'], status_response.data['fan_out_pending'],
+             status_response.data['fan_out_failed']),
+            (0, False, True)
+        )
+        self.assertIn('database is locked', status_response.data['fan_out_error'])
+
+    def test_price_drop_notifies_favoriters(self):
+        prop = self.create_properties(1, price=1000)[0]
+        prop.favorites.add(self.user)
+        prop = Property.objects.get(pk=prop.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            prop.price = 1200
+            prop.save()
+            prop.price = 900
+            with CaptureQueriesContext(connection) as queries:
+                prop.save()
+            prop.name = 'Renamed'
+            prop.save()
+
+        # The save itself does not resolve or insert recipients
+        self.assertFalse([query for query in queries if 'properties_notification' in query['sql']])
+
+        self.assertEqual(
+            [(item.user_id, item.message) for item in notifications.LocmemTransport.outbox],
+            [(self.user.id, 'Price drop: Property 0 is now 900 (was 1200)')]
+        )
+
+    @override_settings(NOTIFICATIONS={
+        'TRANSPORT': 'properties.tests.FailingTransport',
+        'MAX_ATTEMPTS': 3,
+        'RETRY_BACKOFF': 0,
+    })
+    def test_failed_delivery_retried_then_marked_failed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job_id = notifications.send('Hello', user_ids=[self.user.id])
+
+        notification = Notification.objects.get(job_id=job_id)
+        self.assertEqual(
+            (notification.status, notification.attempts, notification.last_error),
+            ('failed', 3, 'push gateway unavailable')
+        )
+
+    def test_requires_user_or_segment(self):
+        response = self.client.post('/api/notifications/', {'message': 'Hi'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+def flaky_job(attempts_to_fail):
+    flaky_job.calls += 1
+    if flaky_job.calls <= attempts_to_fail:
+        raise RuntimeError('temporary failure')
+
+
+flaky_job.calls = 0
+jobs.job('tests.flaky')(flaky_job)
+
+
+@jobs.job('tests.read_database')
+def read_database_job():
+    read_database_job.aliases.append(ReplicaRouter().db_for_read(Property))
+
+
+read_database_job.aliases = []
+
+
+@override_settings(JOBS={'ALWAYS_EAGER': False, 'RETRY_BACKOFF': 0, 'MAX_ATTEMPTS': 2})
+class JobTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        flaky_job.calls = 0
+
+    def test_idempotency_key_coalesces_queued_jobs(self):
+        for _ in range(3):
+            jobs.enqueue('tests.flaky', {'attempts_to_fail': 0}, idempotency_key='same')
+        jobs.enqueue('tests.flaky', {'attempts_to_fail': 0})
+
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(jobs.run_pending(), 2)
+        self.assertEqual(flaky_job.calls, 2)
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_retried_then_kept_as_failed(self):
+        jobs.enqueue('tests.flaky', {'attempts_to_fail': 1})
+        jobs.enqueue('tests.flaky', {'attempts_to_fail': 5}, idempotency_key='doomed')
+
+        jobs.run_pending()
+
+        job = Job.objects.get()
+        self.assertEqual((job.idempotency_key, job.status, job.attempts), ('doomed', 'failed', 2))
+        self.assertIn('temporary failure', job.last_error)
+
+    def test_jobs_enqueued_in_rolled_back_transaction_are_dropped(self):
+        try:
+            with transaction.atomic():
+                jobs.enqueue('tests.flaky', {'attempts_to_fail': 0})
+                raise RuntimeError('write failed')
+        except RuntimeError:
+            pass
+
+        self.assertEqual(jobs.run_pending(), 0)
+
+    @override_settings(JOBS={'ALWAYS_EAGER': True})
+    def test_eager_jobs_run_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            jobs.enqueue('tests.flaky', {'attempts_to_fail': 0})
+        self.assertEqual(flaky_job.calls, 0)
+
+        callbacks[0]()
+        self.assertEqual(flaky_job.calls, 1)
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_handlers_read_from_primary(self):
+        read_database_job.aliases = []
+        jobs.enqueue('tests.read_database')
+        jobs.run_pending()
+
+        with override_settings(JOBS={'ALWAYS_EAGER': True}):
+            with self.captureOnCommitCallbacks(execute=True):
+                jobs.enqueue('tests.read_database')
+
+        # None: not routed to a replica
+        self.assertEqual(read_database_job.aliases, [None, None])
+        self.assertEqual(ReplicaRouter().db_for_read(Property), 'replica1')
+
+
+class ProfileWriteTests(PropertyTestCase):
+    def test_registration_writes_profile_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/register/',
+                {'name': 'New', 'email': 'new@example.com', 'password': 'secret-pass-123'},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        # INSERT user + INSERT profile; previously also an UPDATE of the profile
+        self.assertEqual(len(queries), 2)
+
+    def test_login_does_not_touch_profile(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/login/',
+                {'username': 'buyer@example.com', 'password': 'secret-pass-123'},
+                format='json'
+            )
+            # Session logins (admin) save last_login on the user
+            update_last_login(None, User.objects.get(pk=self.user.pk))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if 'properties_profile' in query['sql']])
+
+    def test_profile_saved_only_when_changed(self):
+        self.client.force_authenticate(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put('/api/user/profile/update/', {'password': 'another-pass-456'})
+        self.assertEqual([query['sql'][:6] for query in queries], ['UPDATE'])
+        self.assertIn('"password"', queries[0]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.put('/api/user/profile/update/', {'phone': '0790000000'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"image"', queries[0]['sql'])
+        self.assertEqual(Profile.objects.get(user=self.user).phone, '0790000000')
+
+        profile = Profile.objects.get(user=self.user)
+        profile.phone = '0790000000'
+        self.assertEqual(profile.changed_fields(), [])
+
+
+class MetricsTests(PropertyTestCase):
+    def setUp(self):
+        super().setUp()
+        metrics.registry.reset()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', is_staff=True)
+
+    def series(self, histogram, view, method='GET'):
+        return metrics.registry.histograms[histogram].series[(view, method)]
+
+    def test_request_recorded_per_url_name(self):
+        self.create_properties(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/properties/?page_size=2')
+
+        self.assertEqual(response.status_code, 200)
+        counts, total = self.series('queries', 'property-list')
+        self.assertEqual(sum(counts), 1)
+        self.assertEqual(total, len(queries))
+        self.assertGreater(self.series('db', 'property-list')[1], 0)
+        self.assertGreater(self.series('serialize', 'property-list')[1], 0)
+        self.assertGreater(self.series('render', 'property-list')[1], 0)
+        self.assertEqual(self.series('bytes', 'property-list')[1], len(response.content))
+        self.assertEqual(metrics.registry.requests[('property-list', 'GET', '200')], 1)
+
+        self.client.get('/api/no-such-route/')
+        self.assertEqual(metrics.registry.requests[('unresolved', 'GET', '404')], 1)
+
+    def test_serializer_time_kept_apart_from_render(self):
+        prop = self.create_properties(1)[0]
+        Comment.objects.create(user=self.user, property=prop, content='Nice')
+        original = PropertySerializer.get_is_favorite
+
+        def slow_is_favorite(serializer, obj):
+            time.sleep(0.05)
+            return original(serializer, obj)
+
+        with mock.patch.object(PropertySerializer, 'get_is_favorite', slow_is_favorite):
+            self.client.get(f'/api/properties/{prop.id}/')
+        self.client.get(f'/api/properties/{prop.id}/comments/')
+
+        self.assertEqual(sum(self.series('serialize', 'property-detail')[0]), 1)
+        self.assertGreaterEqual(self.series('serialize', 'property-detail')[1], 0.05)
+        self.assertLess(self.series('render', 'property-detail')[1], 0.05)
+        self.assertGreater(self.series('serialize', 'property-comments')[1], 0)
+
+    async def test_async_view_queries_counted(self):
+        await sync_to_async(self.create_properties)(2)
+        response = await self.async_client.get('/api/async/properties/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(self.series('queries', 'async-property-list')[1], 0)
+        self.assertGreater(self.series('serialize', 'async-property-list')[1], 0)
+
+    def test_prometheus_endpoint_admin_only(self):
+        self.client.get('/api/categories/')
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/admin/metrics/').status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get('/api/admin/metrics/')
+        body = response.content.decode()
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{view="category-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_db_queries_count{view="category-list",method="GET"} 1', body)
+        self.assertIn('http_request_db_queries_bucket{view="category-list",method="GET",le="+Inf"} 1', body)
+
+    @override_settings(METRICS={'SLOW_REQUEST_MS': 0, 'SLOW_REQUEST_TOP_SQL': 2})
+    def test_slow_request_logs_top_sql(self):
+        self.create_properties(2)
+        with self.assertLogs('properties.metrics', level='WARNING') as logs:
+            self.client.get('/api/properties/')
+
+        message = logs.output[0]
+        self.assertIn('Slow request: GET /api/properties/ (property-list) -> 200', message)
+        self.assertIn('FROM "properties_property"', message)
+        self.assertLessEqual(len(message.splitlines()), 3)
+
+    @override_settings(METRICS={'ENABLED': False})
+    def test_disabled(self):
+        self.client.get('/api/categories/')
+        self.assertEqual(metrics.registry.requests, {})
+
+
+class BenchmarkTests(PropertyTestCase):
+    def test_seed_uses_bulk_inserts(self):
+        with CaptureQueriesContext(connection) as queries:
+            created = benchmark.seed(
+                categories=2, properties=50, users=10, favorites=40, purchases=20, comments=30,
+                batch_size=100, rng=random.Random(1)
+            )
+
+        self.assertEqual(created['properties'], 50)
+        self.assertEqual(Profile.objects.filter(user__username__startswith=benchmark.USER_PREFIX).count(), 10)
+        # Counters are consistent with the seeded rows
+        self.assertEqual(counters.reconcile(), 0)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT')]
+        self.assertLess(len(inserts), 20)
+
+    def test_scenarios_report_percentiles_and_queries(self):
+        benchmark.seed(
+            categories=1, properties=20, users=3, favorites=10, purchases=5, comments=10,
+            rng=random.Random(2)
+        )
+        dataset = benchmark.Dataset()
+        transport = benchmark.ClientTransport()
+
+        for name in benchmark.SCENARIOS:
+            with self.captureOnCommitCallbacks(execute=True):
+                result = benchmark.run_scenario(name, dataset, transport, requests=5, warmup=1, seed=0)
+            self.assertEqual(result['requests'], 5)
+            self.assertEqual(result['errors'], 0, (name, result['error_samples']))
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+            self.assertIsNotNone(result['queries_per_request'])
+
+    def test_compare_flags_regressions(self):
+        baseline = {'scenarios': {'list': {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'queries_per_request': 2}}}
+        current = {'scenarios': {'list': {'p50_ms': 10.5, 'p95_ms': 30.0, 'p99_ms': 30.0, 'queries_per_request': 3}}}
+
+        report = benchmark.compare(baseline, current, threshold=10)['list']
+        self.assertFalse(report['p50_ms'][3])
+        self.assertEqual(report['p95_ms'][2:], (50.0, True))
+        self.assertTrue(report['queries_per_request'][3])
+        self.assertEqual(benchmark.percentile_of([1, 2, 3, 4], 50), 2)
@@ -8,14 +8,26 @@ from .views import (
     RegisterView,
     UserProfileView,
     UserPurchasesView,
+    UserFavoritesView,
     CategoryViewSet,
     PropertyViewSet,
     checkout_cart,
     update_user_profile,
+    sync_user_favorites,
     send_notification,
+    notification_job_status,
     add_to_user_purchases,
     list_all_comments,
     delete_comment,
+    response_cache_stats,
+    request_metrics,
+)
+from .async_views import (
+    AsyncFeaturedPropertiesView,
+    AsyncPropertyListView,
+    AsyncPropertyDetailView,
+    AsyncCategoryListView,
+    AsyncPropertyCommentsView,
 )
 
 router = DefaultRouter()
@@ -37,11 +49,20 @@ urlpatterns = [
     path('user/purchases/', UserPurchasesView.as_view(), name='user-purchases'),
     path('user/purchases/add/', add_to_user_purchases, name='add-user-purchase'),
 
+    # Favorites endpoints
+    path('user/favorites/', UserFavoritesView.as_view(), name='user-favorites'),
+    path('user/favorites/sync/', sync_user_favorites, name='user-favorites-sync'),
+
     # Cart endpoints
     path('cart/checkout/', checkout_cart, name='cart-checkout'),
 
     # Notification endpoints
     path('notifications/', send_notification, name='send-notification'),
+    path(
+        'notifications/<uuid:job_id>/',
+        notification_job_status,
+        name='notification-job-status'
+    ),
 
     # Admin comment management
     path('admin/comments/', list_all_comments, name='admin-list-comments'),
@@ -50,6 +71,27 @@ urlpatterns = [
         delete_comment,
         name='admin-delete-comment'
     ),
+
+    # Admin cache statistics
+    path('admin/cache/stats/', response_cache_stats, name='admin-cache-stats'),
+
+    # Admin request metrics (Prometheus)
+    path('admin/metrics/', request_metrics, name='admin-metrics'),
+
+    # Async (ASGI) read endpoints
+    path('async/featured/', AsyncFeaturedPropertiesView.as_view(), name='async-featured'),
+    path('async/properties/', AsyncPropertyListView.as_view(), name='async-property-list'),
+    path(
+        'async/properties/<int:pk>/',
+        AsyncPropertyDetailView.as_view(),
+        name='async-property-detail'
+    ),
+    path(
+        'async/properties/<int:pk>/comments/',
+        AsyncPropertyCommentsView.as_view(),
+        name='async-property-comments'
+    ),
+    path('async/categories/', AsyncCategoryListView.as_view(), name='async-category-list'),
 ]
 
 # Serve media files during development
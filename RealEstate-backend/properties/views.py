@@ -1,6 +1,8 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Count, Max, Prefetch, Sum
+from django.http import HttpResponse, JsonResponse
 from django.views import View
 
 from rest_framework import viewsets, status, generics
@@ -29,41 +31,65 @@ from .serializers import (
     RegisterSerializer,
     PropertySerializer,
     CategorySerializer,
-    CommentSerializer
+    CommentSerializer,
+    CartItemSerializer,
+    PropertyModerationSerializer,
+    FavoriteSyncSerializer,
+    NotificationSendSerializer
 )
+from .pagination import (
+    PropertyCursorPagination,
+    PropertySearchCursorPagination,
+    PurchaseCursorPagination,
+    PurchaseGroupCursorPagination,
+    CommentCursorPagination
+)
+from .routers import use_primary
+from .filters import PropertyFilterBackend, PropertyOrderingFilter, facet_counts
+from . import bulk
+from . import counters
+from . import search as property_search
+from . import cache as response_cache
+from . import images
+from . import metrics
+from . import moderation
+from . import notifications
+from . import streaming
 
 
 # ----------------------------
 # Featured properties (public)
 # ----------------------------
 class FeaturedPropertiesView(View):
+    @response_cache.cached_response(response_cache.FEATURED)
     def get(self, request, *args, **kwargs):
-        featured_properties = Property.objects.filter(
+        featured_properties = Property.objects.for_listing().filter(
             is_featured=True,
             status='approved'
         )
 
-        data = []
-        for prop in featured_properties:
-            data.append({
-                "id": prop.id,
-                "name": prop.name,
-                "image_path": prop.image_path.url if prop.image_path else "",
-                "type": prop.type,
-                "location": prop.location,
-                "price": str(prop.price),
-                "is_featured": prop.is_featured,
-                "status": prop.status,
-                "category": {
-                    "id": prop.category.id,
-                    "name": prop.category.name,
-                    "icon": prop.category.icon,
-                }
-            })
-
+        data = [featured_property_data(prop) for prop in featured_properties]
         return JsonResponse(data, safe=False)
 
 
+def featured_property_data(prop):
+    return {
+        "id": prop.id,
+        "name": prop.name,
+        "image_path": prop.image_path.url if prop.image_path else "",
+        "type": prop.type,
+        "location": prop.location,
+        "price": str(prop.price),
+        "is_featured": prop.is_featured,
+        "status": prop.status,
+        "category": {
+            "id": prop.category.id,
+            "name": prop.category.name,
+            "icon": prop.category.icon,
+        }
+    }
+
+
 # ----------------------------
 # Purchases & cart
 # ----------------------------
@@ -93,22 +119,41 @@ def checkout_cart(request):
     if not items:
         return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
 
-    for item in items:
-        property_id = item.get("property_id")
-        quantity = item.get("quantity", 1)
-
-        try:
-            property_obj = Property.objects.get(id=property_id)
-            for _ in range(quantity):
-                Purchase.objects.create(user=request.user, property=property_obj)
+    serializer = CartItemSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        return Response(
+            {"error": "Invalid cart", "details": serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        except Property.DoesNotExist:
-            return Response(
-                {"error": f"Property {property_id} not found"},
-                status=status.HTTP_404_NOT_FOUND
+    # One row per cart item (quantity stored on the row), written atomically
+    with transaction.atomic():
+        purchases = Purchase.objects.bulk_create([
+            Purchase(
+                user=request.user,
+                property=item['property'],
+                quantity=item['quantity']
             )
+            for item in serializer.validated_data
+        ])
 
-    return Response({"message": "Checkout completed successfully"}, status=status.HTTP_200_OK)
+        # bulk_create sends no post_save, so bump the counters here
+        quantities = {}
+        for purchase in purchases:
+            quantities[purchase.property_id] = quantities.get(purchase.property_id, 0) + purchase.quantity
+        counters.adjust('purchases_count', quantities)
+
+    return Response({
+        "message": "Checkout completed successfully",
+        "items": [
+            {
+                "purchase_id": purchase.id,
+                "property_id": purchase.property_id,
+                "quantity": purchase.quantity,
+            }
+            for purchase in purchases
+        ]
+    }, status=status.HTTP_200_OK)
 
 
 # ----------------------------
@@ -118,24 +163,45 @@ def checkout_cart(request):
 @permission_classes([IsAdminUser])
 @parser_classes([JSONParser])
 def send_notification(request):
-    user_id = request.data.get('user_id')
-    message = request.data.get('message')
-
-    if not user_id or not message:
+    serializer = NotificationSendSerializer(data=request.data)
+    if not serializer.is_valid():
         return Response(
-            {"error": "user_id and message are required"},
+            {"error": "Invalid notification", "details": serializer.errors},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Placeholder notification logic
-    print(f"Notification to user {user_id}: {message}")
-
+    data = serializer.validated_data
+    # Fan-out and delivery happen in the background; poll the job for progress
+    job_id = notifications.send(
+        data['message'],
+        user_ids=[data['user_id']] if 'user_id' in data else None,
+        segment=data.get('segment'),
+        property_id=data.get('property_id')
+    )
     return Response(
-        {"message": "Notification sent successfully"},
-        status=status.HTTP_200_OK
+        {"message": "Notification queued", "job_id": job_id},
+        status=status.HTTP_202_ACCEPTED
     )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def notification_job_status(request, job_id):
+    counts = notifications.job_status(job_id)
+    pending_fan_out = notifications.fan_out_pending(job_id)
+    fan_out_error = notifications.fan_out_error(job_id)
+    if not any(counts.values()) and not pending_fan_out and fan_out_error is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({
+        "job_id": job_id,
+        "recipients": sum(counts.values()),
+        "fan_out_pending": pending_fan_out,
+        "fan_out_failed": fan_out_error is not None,
+        "fan_out_error": fan_out_error,
+        **counts
+    })
+
+
 # ----------------------------
 # Authentication
 # ----------------------------
@@ -196,7 +262,12 @@ class UserProfileView(APIView):
             "email": request.user.email,
             "phone": profile.phone if profile else "",
             "is_admin": request.user.is_staff,
-            "image_url": image_url
+            "image_url": image_url,
+            "image_variants": images.variant_urls(
+                profile.image if profile else None,
+                profile.variants_source if profile else '',
+                request
+            )
         }, status=status.HTTP_200_OK)
 
 
@@ -223,37 +294,156 @@ def update_user_profile(request):
         profile.image = image
     if password:
         user.set_password(password)
-        user.save()
+        user.save(update_fields=['password'])
 
-    profile.save()
+    # Only write the profile if the request actually changed it
+    changed = profile.changed_fields()
+    if changed:
+        profile.save(update_fields=changed)
     return Response({"message": "Profile updated successfully"}, status=status.HTTP_200_OK)
 
 
-class UserPurchasesView(APIView):
+class UserFavoritesView(generics.ListAPIView):
     permission_classes = [IsAuthenticated]
+    serializer_class = PropertySerializer
+    pagination_class = PropertyCursorPagination
+    filter_backends = [PropertyFilterBackend, PropertyOrderingFilter]
 
+    def get_queryset(self):
+        queryset = self.request.user.favorite_properties.for_listing()
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(status='approved')
+
+    # Read-your-writes: usually opened right after a favorites sync
+    @use_primary()
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([JSONParser])
+def sync_user_favorites(request):
+    serializer = FavoriteSyncSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    add_ids = set(serializer.validated_data['add'])
+    remove_ids = set(serializer.validated_data['remove']) - add_ids
+    through = Property.favorites.through
+    user = request.user
+
+    with transaction.atomic():
+        visible = Property.objects.filter(pk__in=add_ids)
+        if not user.is_staff:
+            visible = visible.filter(status='approved')
+        visible_ids = set(visible.values_list('pk', flat=True))
+        existing = set(
+            through.objects.filter(user=user, property_id__in=visible_ids)
+            .values_list('property_id', flat=True)
+        )
+        added = visible_ids - existing
+
+        through.objects.bulk_create(
+            [through(user=user, property_id=property_id) for property_id in added],
+            ignore_conflicts=True
+        )
+        removed, _ = through.objects.filter(user=user, property_id__in=remove_ids).delete()
+
+        # Neither bulk write sends m2m_changed, so do what its receivers do
+        changed_ids = added | remove_ids
+        if added or removed:
+            counters.recount_favorites(changed_ids)
+            response_cache.invalidate_on_commit(response_cache.PROPERTIES, response_cache.FEATURED)
+
+    return Response({
+        "added": len(added),
+        "removed": removed,
+        "not_found": sorted(add_ids - visible_ids),
+    }, status=status.HTTP_200_OK)
+
+
+class UserPurchasesView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    pagination_class = PurchaseCursorPagination
+
+    def get_queryset(self):
+        return Purchase.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('property', queryset=Property.objects.for_listing())
+        )
+
+    # Read-your-writes: usually opened right after a checkout
+    @use_primary()
     def get(self, request):
-        purchases = Purchase.objects.filter(user=request.user)
-        result = []
+        if request.query_params.get('group_by') == 'property':
+            return self.get_grouped(request)
 
-        for purchase in purchases:
-            if purchase.property:
-                serialized_property = PropertySerializer(
-                    purchase.property,
-                    context={'request': request}
-                ).data
-            else:
-                serialized_property = None
-
-            result.append({
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        purchases = page if page is not None else list(queryset)
+        properties = self.serialize_properties([purchase.property for purchase in purchases])
+
+        result = [
+            {
                 "id": purchase.id,
                 "property": serialized_property,
                 "quantity": purchase.quantity,
                 "purchase_date": purchase.purchase_date,
-            })
+            }
+            for purchase, serialized_property in zip(purchases, properties)
+        ]
 
+        if page is not None:
+            return self.get_paginated_response(result)
         return Response(result, status=status.HTTP_200_OK)
 
+    def get_grouped(self, request):
+        # One row per property with the summed quantity, in one aggregate query
+        queryset = Purchase.objects.filter(
+            user=request.user,
+            property__isnull=False
+        ).values('property_id').annotate(
+            total_quantity=Sum('quantity'),
+            purchase_count=Count('id'),
+            last_purchase_date=Max('purchase_date')
+        ).order_by('property_id')
+
+        paginator = PurchaseGroupCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        groups = page if page is not None else list(queryset)
+
+        properties = Property.objects.for_listing().in_bulk(
+            [group['property_id'] for group in groups]
+        )
+        serialized = self.serialize_properties(
+            [properties.get(group['property_id']) for group in groups]
+        )
+
+        result = [
+            {
+                "property": serialized_property,
+                "quantity": group['total_quantity'],
+                "purchase_count": group['purchase_count'],
+                "last_purchase_date": group['last_purchase_date'],
+            }
+            for group, serialized_property in zip(groups, serialized)
+        ]
+
+        if page is not None:
+            return paginator.get_paginated_response(result)
+        return Response(result, status=status.HTTP_200_OK)
+
+    def serialize_properties(self, properties):
+        # Serialize the whole page at once so is_favorite costs one query
+        existing = [prop for prop in properties if prop is not None]
+        data = iter(PropertySerializer(
+            existing,
+            many=True,
+            context=self.get_serializer_context()
+        ).data)
+        return [next(data) if prop is not None else None for prop in properties]
+
 
 # ----------------------------
 # Comments (admin & public)
@@ -266,6 +456,10 @@ def list_all_comments(request):
         'property'
     ).order_by('-created_at')
 
+    stream = streaming.requested_format(request)
+    if stream:
+        return streaming.streaming_response(comments, CommentSerializer, stream)
+
     serializer = CommentSerializer(comments, many=True)
     return Response(serializer.data)
 
@@ -287,6 +481,19 @@ def delete_comment(request, comment_id):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def response_cache_stats(request):
+    return Response(response_cache.stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def request_metrics(request):
+    # Prometheus text format; the histograms of this process only
+    return HttpResponse(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 # ----------------------------
 # Category ViewSet
 # ----------------------------
@@ -294,6 +501,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    @response_cache.cached_response(response_cache.CATEGORIES)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 # ----------------------------
 # Property ViewSet
@@ -301,41 +512,67 @@ class CategoryViewSet(viewsets.ModelViewSet):
 class PropertyViewSet(viewsets.ModelViewSet):
     serializer_class = PropertySerializer
     parser_classes = (MultiPartParser, FormParser)
+    pagination_class = PropertyCursorPagination
+    filter_backends = [PropertyFilterBackend, PropertyOrderingFilter]
 
     def get_queryset(self):
         user = self.request.user
+        if self.action in ('favorite', 'unfavorite', 'buy', 'comments'):
+            # These only need the row to exist (and be visible), not the
+            # joined listing data
+            queryset = Property.objects.only('id', 'status')
+        else:
+            queryset = Property.objects.for_listing()
         if user.is_staff:
-            return Property.objects.all()
-        return Property.objects.filter(status='approved')
+            return queryset
+        return queryset.filter(status='approved')
+
+    # Anonymous listings carry no per-user data, so they are shared
+    @response_cache.cached_response(response_cache.PROPERTIES, anonymous_only=True)
+    def list(self, request, *args, **kwargs):
+        # ?stream=json|ndjson: full export rendered row by row
+        stream = streaming.requested_format(request)
+        if stream:
+            return streaming.streaming_response(
+                self.filter_queryset(self.get_queryset()),
+                self.get_serializer_class(),
+                stream,
+                context=self.get_serializer_context()
+            )
+        return super().list(request, *args, **kwargs)
+
+    def _list_response(self, queryset, default_ordering=None):
+        # Same contract as ``list``: paginated when the client asks for a
+        # cursor/page_size, the full list otherwise.
+        if default_ordering:
+            self.paginator.default_ordering = default_ordering
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @response_cache.cached_response(response_cache.FEATURED, anonymous_only=True)
     def featured(self, request):
-        queryset = Property.objects.filter(is_featured=True)
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset()).filter(is_featured=True)
+        return self._list_response(queryset)
 
     @action(detail=False, methods=['get'])
     def by_category(self, request):
-        category_id = request.query_params.get('category_id')
-        if not category_id:
+        if not request.query_params.get('category_id'):
             return Response(
                 {"error": "category_id is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            category = Category.objects.get(id=category_id)
-        except Category.DoesNotExist:
-            return Response(
-                {"error": "Category not found"},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # category_id itself is applied by PropertyFilterBackend
+        properties = self.filter_queryset(self.get_queryset())
+        return self._list_response(properties)
 
-        properties = Property.objects.filter(category=category)
-        serializer = self.get_serializer(properties, many=True, context={'request': request})
-        return Response(serializer.data)
-
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], pagination_class=PropertySearchCursorPagination)
     def search(self, request):
         query = request.query_params.get('q')
         if not query:
@@ -344,15 +581,91 @@ class PropertyViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        queryset = Property.objects.filter(name__icontains=query)
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        # Ranked by relevance, also when paginated (the ``rank`` keyset
+        # ordering). The filters run after the search so that an explicit
+        # ``?ordering=`` replaces the rank ordering.
+        queryset = property_search.search(self.get_queryset(), query)
+        return self._list_response(self.filter_queryset(queryset))
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=[IsAuthenticated]
+    )
+    def bulk_import(self, request):
+        # Open to agents; their rows land as pending (see bulk._import_batch)
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {"error": "A CSV or NDJSON file is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        file_format = request.data.get('file_format') or bulk.infer_format(upload.name)
+        if file_format not in bulk.FORMATS:
+            return Response(
+                {"error": "file_format must be csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report = bulk.import_properties(
+            bulk.read_rows(upload, file_format),
+            user=request.user
+        )
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def export(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in bulk.FORMATS:
+            return Response(
+                {"error": "file_format must be csv or ndjson"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(Property.objects.all())
+        return bulk.export_response(queryset, file_format)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def pending(self, request):
-        queryset = Property.objects.filter(status='pending')
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset()).filter(status='pending')
+        return self._list_response(queryset)
+
+    @action(
+        detail=False,
+        methods=['post'],
+        permission_classes=[IsAdminUser],
+        parser_classes=[JSONParser]
+    )
+    def moderate(self, request):
+        serializer = PropertyModerationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        result = moderation.moderate(
+            data['ids'],
+            moderation.ACTIONS[data['action']],
+            reason=data['reason'],
+            moderator=request.user
+        )
+        return Response(result, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    @response_cache.cached_response(response_cache.PROPERTIES, anonymous_only=True)
+    def popular(self, request):
+        # Served from the precomputed popularity_score index
+        queryset = self.filter_queryset(self.get_queryset())
+        if 'ordering' not in request.query_params:
+            queryset = queryset.order_by('-popularity_score', '-id')
+        return self._list_response(queryset, default_ordering='popular')
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(facet_counts(queryset))
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def favorite(self, request, pk=None):
@@ -378,13 +691,21 @@ class PropertyViewSet(viewsets.ModelViewSet):
         permission_classes=[AllowAny],
         parser_classes=[JSONParser]
     )
+    @response_cache.cached_response(
+        lambda pk=None, **kwargs: response_cache.comments_namespace(pk),
+        first_page_only=True
+    )
     def comments(self, request, pk=None):
         property_obj = self.get_object()
 
         if request.method == 'GET':
-            comments = Comment.objects.filter(property=property_obj).order_by('-created_at')
-            serializer = CommentSerializer(comments, many=True)
-            return Response(serializer.data)
+            comments = Comment.objects.filter(property=property_obj).for_listing()
+
+            paginator = CommentCursorPagination()
+            page = paginator.paginate_queryset(comments, request, view=self)
+            if page is not None:
+                return paginator.get_paginated_response(CommentSerializer(page, many=True).data)
+            return Response(CommentSerializer(comments, many=True).data)
 
         if not request.user.is_authenticated:
             return Response(